@@ -0,0 +1,113 @@
+"""Response compression: brotli when available and accepted, gzip otherwise.
+
+brotli is used when the package is installed; without it every client that
+accepts gzip gets gzip from Starlette's middleware. Brotli is applied to
+complete (non-streamed) bodies only, which covers the JSON endpoints;
+streamed responses such as server-sent events pass through unchanged.
+
+A compressed response is a different representation, so its ``ETag`` gets a
+per-encoding suffix (``"x"`` becomes ``"x-br"`` or ``"x-gzip"``); a 304 that
+answers a request for such a tag carries the same suffixed tag.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+from app.responses import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised when brotli is absent
+    brotli = None
+
+
+def accepts_encoding(scope, encoding: str) -> bool:
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in {"q=0", "q=0.0", "q=0.00", "q=0.000"}
+    return False
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if brotli is not None and accepts_encoding(scope, "br"):
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+            await responder(scope, receive, retag_encoded(scope, send, "br"))
+            return
+        encoding = "gzip" if accepts_encoding(scope, "gzip") else None
+        await self.gzip(scope, receive, retag_encoded(scope, send, encoding))
+
+
+def retag_encoded(scope, send, encoding):
+    """Wrap ``send`` so responses compressed with ``encoding``, and 304s for them, get its ETag."""
+    if encoding is None:
+        return send
+    requested = {
+        candidate.strip().removeprefix("W/")
+        for candidate in Headers(scope=scope).get("if-none-match", "").split(",")
+    }
+
+    async def send_retagged(message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=list(message["headers"]))
+            etag = headers.get("etag")
+            if etag:
+                tagged = encoded_etag(etag, encoding)
+                if headers.get("content-encoding") == encoding or (
+                    message["status"] == 304 and tagged.removeprefix("W/") in requested
+                ):
+                    headers["ETag"] = tagged
+                    message = {**message, "headers": headers.raw}
+        await send(message)
+
+    return send_retagged
+
+
+class BrotliResponder:
+    def __init__(self, app, minimum_size: int, quality: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send = None
+        self.start = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body message shows whether to compress.
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        if (
+            message.get("more_body", False)
+            or len(body) < self.minimum_size
+            or "content-encoding" in headers
+            or headers.get("content-type", "").startswith("text/event-stream")
+        ):
+            await self.send(start)
+            await self.send(message)
+            return
+        compressed = brotli.compress(body, quality=self.quality)
+        headers["Content-Encoding"] = "br"
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        await self.send({**start, "headers": headers.raw})
+        await self.send({"type": "http.response.body", "body": compressed})
@@ -8,16 +8,52 @@ load_dotenv()
 class Settings:
     def __init__(self) -> None:
         self.database_url = os.getenv("DATABASE_URL", "sqlite:///./agentflow.db")
+        self.db_create_all = os.getenv("DB_CREATE_ALL", "auto").strip().lower()
         cors_env = os.getenv("CORS_ORIGINS", "http://localhost:3000")
         origins = [origin.strip() for origin in cors_env.split(",") if origin.strip()]
         frontend_url = os.getenv("FRONTEND_URL", "").strip()
         if frontend_url:
             origins.append(frontend_url)
         self.cors_origins = sorted(set(origins))
+        self.compression_min_bytes = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
         self.demo_token = os.getenv("DEMO_TOKEN", "agentflow-demo-token")
         self.app_name = os.getenv("APP_NAME", "AgentFlow Lite")
         self.gemini_api_key = os.getenv("GEMINI_API_KEY", "")
         self.gemini_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+        self.gemini_api_base = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta/models/")
+        self.workflow_generator = os.getenv("WORKFLOW_GENERATOR", "gemini").strip().lower()
+        self.generation_cache_size = int(os.getenv("GENERATION_CACHE_SIZE", "256"))
+        self.generation_cache_ttl_seconds = float(os.getenv("GENERATION_CACHE_TTL_SECONDS", "3600"))
+        self.generation_max_repairs = int(os.getenv("GENERATION_MAX_REPAIRS", "2"))
+        self.http_rate_limit_per_second = float(os.getenv("HTTP_RATE_LIMIT_PER_SECOND", "0"))
+        self.http_rate_limit_burst = float(os.getenv("HTTP_RATE_LIMIT_BURST", "10"))
+        self.http_max_concurrency_per_host = int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "0"))
+        self.http_max_response_bytes = int(os.getenv("HTTP_MAX_RESPONSE_BYTES", str(10 * 1024 * 1024)))
+        self.llm_rate_limit_per_minute = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", "0"))
+        self.llm_rate_limit_burst = float(os.getenv("LLM_RATE_LIMIT_BURST", "5"))
+        self.llm_max_concurrency_per_model = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "0"))
+        self.llm_provider = os.getenv("LLM_PROVIDER", "gemini").strip().lower()
+        self.llm_batch_max_size = int(os.getenv("LLM_BATCH_MAX_SIZE", "8"))
+        self.llm_batch_window_ms = float(os.getenv("LLM_BATCH_WINDOW_MS", "10"))
+        self.llm_stream = os.getenv("LLM_STREAM", "false").strip().lower() in {"1", "true", "yes"}
+        self.llm_stream_max_bytes = int(os.getenv("LLM_STREAM_MAX_BYTES", "262144"))
+        self.output_spill_bytes = int(os.getenv("OUTPUT_SPILL_BYTES", str(1024 * 1024)))
+        self.output_spill_dir = os.getenv("OUTPUT_SPILL_DIR", "")
+        self.output_release = os.getenv("OUTPUT_RELEASE", "true").strip().lower() in {"1", "true", "yes"}
+        self.blob_dir = os.getenv("BLOB_DIR", "./blobs")
+        self.blob_max_bytes = int(os.getenv("BLOB_MAX_BYTES", str(20 * 1024 * 1024)))
+        self.subworkflow_max_depth = int(os.getenv("SUBWORKFLOW_MAX_DEPTH", "5"))
+        self.plan_cache_size = int(os.getenv("PLAN_CACHE_SIZE", "128"))
+        self.run_cancel_poll_seconds = float(os.getenv("RUN_CANCEL_POLL_SECONDS", "1"))
+        self.idempotency_wait_seconds = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+        self.run_events_poll_seconds = float(os.getenv("RUN_EVENTS_POLL_SECONDS", "1"))
+        self.run_execution = os.getenv("RUN_EXECUTION", "inline").strip().lower()
+        self.run_priority_weights = os.getenv("RUN_PRIORITY_WEIGHTS", "interactive=8,batch=2,background=1")
+        self.workflow_max_concurrency = int(os.getenv("WORKFLOW_MAX_CONCURRENCY", "0"))
+        self.worker_lease_seconds = float(os.getenv("WORKER_LEASE_SECONDS", "60"))
+        self.worker_heartbeat_seconds = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "10"))
+        self.worker_poll_seconds = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+        self.worker_max_attempts = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
 
 
 settings = Settings()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, Text
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, JSON, String, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -12,6 +12,8 @@ class Workflow(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1)
+    max_concurrency = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     nodes = relationship("Node", back_populates="workflow", cascade="all, delete-orphan")
@@ -44,12 +46,28 @@ class Edge(Base):
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        Index("ix_runs_queue", "status", "workflow_id", "priority"),
+        UniqueConstraint("workflow_id", "idempotency_key", name="uq_runs_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     workflow_id = Column(Integer, ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False)
-    status = Column(String(20), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    priority = Column(String(20), nullable=False, default="interactive")
+    queued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    queue_wait_seconds = Column(Float, nullable=True)
     started_at = Column(DateTime, nullable=True)
     finished_at = Column(DateTime, nullable=True)
+    run_input = Column(JSON, nullable=True)
+    worker_id = Column(String(200), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    deadline_at = Column(DateTime, nullable=True)
+    cancel_requested_at = Column(DateTime, nullable=True)
+    idempotency_key = Column(String(255), nullable=True)
+    idempotency_fingerprint = Column(String(64), nullable=True)
 
     workflow = relationship("Workflow", back_populates="runs")
     logs = relationship("StepLog", back_populates="run", cascade="all, delete-orphan")
@@ -57,12 +75,23 @@ class Run(Base):
 
 class StepLog(Base):
     __tablename__ = "step_logs"
+    __table_args__ = (Index("ix_step_logs_run_id", "run_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(Integer, ForeignKey("runs.id", ondelete="CASCADE"), nullable=False)
+    # Set for steps of a sub-workflow; None means the run's own workflow.
+    workflow_id = Column(Integer, nullable=True)
     node_id = Column(Integer, nullable=True)
     status = Column(String(20), nullable=False)
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     run = relationship("Run", back_populates="logs")
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
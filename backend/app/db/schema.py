@@ -0,0 +1,172 @@
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import UniqueConstraint, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import AddConstraint
+
+from app.config import settings
+from app.db.base import Base
+from app.db.models import Run, SchemaVersion, StepLog, Workflow
+
+# ``create_all`` only creates missing tables; it never adds columns or
+# indexes to tables that already exist. Bump this whenever a model gains a
+# column or index and register a step in MIGRATIONS that brings a database
+# at the previous version up to the new one.
+SCHEMA_VERSION = 6
+
+
+def stored_schema_version(bind: Engine) -> Optional[int]:
+    # Core table access keeps the check from configuring every ORM mapper.
+    table = SchemaVersion.__table__
+    try:
+        with bind.connect() as connection:
+            return connection.execute(select(table.c.version).where(table.c.id == 1)).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def _index_names(connection: Connection, table_name: str) -> Set[str]:
+    inspector = inspect(connection)
+    names = {index["name"] for index in inspector.get_indexes(table_name)}
+    names.update(constraint["name"] for constraint in inspector.get_unique_constraints(table_name))
+    return names
+
+
+def _add_column(connection: Connection, model, name: str, default: Optional[str] = None) -> bool:
+    """Add a model column to its existing table; ``default`` is a SQL literal for existing rows.
+
+    Returns False when the column is already there.
+    """
+    table = model.__table__
+    if name in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        return False
+    column = table.c[name]
+    preparer = connection.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+        f"{column.type.compile(dialect=connection.dialect)}"
+    )
+    if default is not None:
+        ddl += f" DEFAULT {default}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    connection.execute(text(ddl))
+    return True
+
+
+def _create_index(connection: Connection, model, name: str) -> None:
+    index = next(index for index in model.__table__.indexes if index.name == name)
+    index.create(connection, checkfirst=True)
+
+
+def _add_unique_constraint(connection: Connection, model, name: str) -> None:
+    table = model.__table__
+    if name in _index_names(connection, table.name):
+        return
+    constraint = next(item for item in table.constraints if item.name == name)
+    if connection.dialect.name != "sqlite":
+        connection.execute(AddConstraint(constraint))
+        return
+    # SQLite cannot add a constraint to an existing table; a unique index enforces the same.
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.format_column(column) for column in constraint.columns)
+    table_name = preparer.format_table(table)
+    connection.execute(text(f"CREATE UNIQUE INDEX {preparer.quote(name)} ON {table_name} ({columns})"))
+
+
+def _upgrade_to_1(connection: Connection) -> None:
+    # Columns added before the schema version was recorded.
+    _add_column(connection, Workflow, "version", "1")
+    _add_column(connection, Run, "run_input")
+    _add_column(connection, Run, "worker_id")
+    _add_column(connection, Run, "heartbeat_at")
+    _add_column(connection, Run, "lease_expires_at")
+    _add_column(connection, Run, "attempts", "0")
+    _create_index(connection, Run, "ix_runs_status")
+
+
+def _upgrade_to_2(connection: Connection) -> None:
+    _add_column(connection, Run, "deadline_at")
+    _add_column(connection, Run, "cancel_requested_at")
+
+
+def _upgrade_to_3(connection: Connection) -> None:
+    _add_column(connection, Workflow, "max_concurrency")
+    _add_column(connection, Run, "priority", "'interactive'")
+    if _add_column(connection, Run, "queued_at", "'1970-01-01 00:00:00'"):
+        connection.execute(text("UPDATE runs SET queued_at = COALESCE(started_at, CURRENT_TIMESTAMP)"))
+    _add_column(connection, Run, "queue_wait_seconds")
+    _create_index(connection, Run, "ix_runs_queue")
+
+
+def _upgrade_to_4(connection: Connection) -> None:
+    _add_column(connection, Run, "idempotency_key")
+    _add_column(connection, Run, "idempotency_fingerprint")
+    _add_unique_constraint(connection, Run, "uq_runs_idempotency_key")
+
+
+def _upgrade_to_5(connection: Connection) -> None:
+    _add_column(connection, StepLog, "workflow_id")
+
+
+def _upgrade_to_6(connection: Connection) -> None:
+    _create_index(connection, StepLog, "ix_step_logs_run_id")
+
+
+# Each step runs when the recorded version is below its key; a database
+# without a recorded version runs them all. Steps skip what already exists.
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    1: _upgrade_to_1,
+    2: _upgrade_to_2,
+    3: _upgrade_to_3,
+    4: _upgrade_to_4,
+    5: _upgrade_to_5,
+    6: _upgrade_to_6,
+}
+
+
+def missing_schema(connection: Connection) -> List[str]:
+    """Model columns, indexes and unique constraints the database lacks, as ``table.name``."""
+    inspector = inspect(connection)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in columns)
+        expected = [index.name for index in table.indexes]
+        expected.extend(item.name for item in table.constraints if isinstance(item, UniqueConstraint))
+        names = _index_names(connection, table.name)
+        missing.extend(f"{table.name}.{name}" for name in expected if name not in names)
+    return missing
+
+
+def ensure_schema(bind: Engine) -> bool:
+    """Create and upgrade the schema according to ``DB_CREATE_ALL``; returns True if it ran.
+
+    ``auto`` skips the metadata round trips when the database already records
+    ``SCHEMA_VERSION``, ``always`` checks on every start and ``never`` leaves
+    the schema to external tooling. Missing tables are created, then every
+    migration newer than the recorded version runs; the version is only
+    recorded once no model column or index is missing.
+    """
+    mode = settings.db_create_all
+    if mode == "never":
+        return False
+    stored = stored_schema_version(bind)
+    if mode == "auto" and stored == SCHEMA_VERSION:
+        return False
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as connection:
+        for version in sorted(MIGRATIONS):
+            if version > (stored or 0):
+                MIGRATIONS[version](connection)
+        missing = missing_schema(connection)
+        if missing:
+            raise RuntimeError(
+                f"Database schema is missing {', '.join(missing)}; not recording version {SCHEMA_VERSION}"
+            )
+        table = SchemaVersion.__table__
+        updated = connection.execute(table.update().where(table.c.id == 1).values(version=SCHEMA_VERSION))
+        if not updated.rowcount:
+            connection.execute(table.insert().values(id=1, version=SCHEMA_VERSION))
+    return True
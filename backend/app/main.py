@@ -1,10 +1,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.compression import CompressionMiddleware
 from app.config import settings
-from app.db.base import Base
+from app.db.schema import ensure_schema
 from app.db.session import engine
-from app.routers import auth, runs, workflows
+from app.routers import auth, blobs, runs, workflows
+
+HEALTH_BODY = b'{"status":"ok"}'
+
+
+class HealthCheckMiddleware:
+    """Answers ``GET /health`` before routing, middleware or the database are involved."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and scope["path"] == "/health" and scope["method"] in {"GET", "HEAD"}:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(HEALTH_BODY)).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": HEALTH_BODY if scope["method"] == "GET" else b""})
+            return
+        await self.app(scope, receive, send)
 
 
 def create_app() -> FastAPI:
@@ -17,10 +43,14 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.compression_min_bytes > 0:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+    app.add_middleware(HealthCheckMiddleware)
 
     app.include_router(auth.router)
     app.include_router(workflows.router)
     app.include_router(runs.router)
+    app.include_router(blobs.router)
 
     @app.get("/health")
     def health() -> dict:
@@ -28,7 +58,7 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     def on_startup() -> None:
-        Base.metadata.create_all(bind=engine)
+        ensure_schema(engine)
 
     return app
 
@@ -0,0 +1,49 @@
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+from app.services.serialization import dumps_bytes
+
+# Clients may cache but must revalidate with If-None-Match before reuse.
+REVALIDATE = "no-cache"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fast serializer; content must be JSON-ready."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+# Content codings the compression middleware may apply; each gets its own entity tag.
+ENCODINGS = ("br", "gzip")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The tag for ``etag``'s representation compressed with ``encoding``: ``"x"`` becomes ``"x-gzip"``."""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison, as RFC 9110 requires).
+
+    Tags of the compressed representations match too: they carry the same content.
+    """
+    if not if_none_match:
+        return False
+    accepted = {etag, *(encoded_etag(etag, encoding) for encoding in ENCODINGS)}
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") in accepted:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+
+def tagged_json(content: Any, etag: str) -> FastJSONResponse:
+    return FastJSONResponse(content, headers={"ETag": etag, "Cache-Control": REVALIDATE})
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.schemas.blob import BlobOut
+from app.services.blob_store import BLOB_PREFIX, BlobTooLarge, blob_store, parse_ref
+
+router = APIRouter(prefix="/blobs", tags=["blobs"])
+
+
+@router.post("", response_model=BlobOut, status_code=201)
+async def upload_blob(request: Request):
+    """Store the raw request body; reference the returned object from ``run_input``."""
+    max_bytes = settings.blob_max_bytes
+    length = request.headers.get("content-length")
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Blob exceeds {max_bytes} bytes")
+    mime_type = (request.headers.get("content-type") or "application/octet-stream").split(";")[0].strip()
+    writer = blob_store.writer(max_bytes)
+    try:
+        async for chunk in request.stream():
+            writer.write(chunk)
+    except BlobTooLarge as exc:
+        writer.abort()
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except BaseException:
+        writer.abort()
+        raise
+    if not writer.size:
+        writer.abort()
+        raise HTTPException(status_code=400, detail="Empty upload")
+    digest = writer.commit()
+    return BlobOut(blob=f"{BLOB_PREFIX}{digest}", mime_type=mime_type, size=writer.size)
+
+
+@router.get("/{blob}")
+def download_blob(blob: str):
+    digest = parse_ref(blob)
+    if digest is None or not blob_store.exists(digest):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return FileResponse(blob_store.path(digest), media_type="application/octet-stream")
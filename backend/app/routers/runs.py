@@ -1,11 +1,21 @@
-from typing import List
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
-from app.db.models import Node, Run, StepLog
-from app.db.session import get_db
-from app.schemas.run import RunSummary, StepLogOut
+from app.config import settings
+from app.db.models import Node, Run, StepLog, Workflow
+from app.db.session import SessionLocal, get_db
+from app.responses import FastJSONResponse, etag_matches, not_modified, tagged_json
+from app.schemas.run import RunOut, RunSummary, StepLogOut
+from app.services.run_control import run_controls
+from app.services.run_events import run_events
+from app.services.run_executor import FINISHED_STATUSES
+from app.services.serialization import dumps
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 
@@ -25,48 +35,187 @@ def get_run(run_id: int, db: Session = Depends(get_db)):
         id=run.id,
         workflow_id=run.workflow_id,
         status=run.status,
+        priority=run.priority,
         started_at=run.started_at,
         finished_at=run.finished_at,
+        queue_wait_seconds=run.queue_wait_seconds,
         total_steps=total_steps,
         success_steps=success_steps,
         failed_steps=failed_steps,
     )
 
 
-@router.get("/{run_id}/logs", response_model=List[StepLogOut])
-def get_run_logs(run_id: int, db: Session = Depends(get_db)):
+@router.post("/{run_id}/cancel", response_model=RunOut)
+def cancel_run(run_id: int, db: Session = Depends(get_db)):
     run = db.query(Run).filter(Run.id == run_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
+    if run.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Run already finished with status {run.status}")
 
+    now = datetime.utcnow()
+    db.query(Run).filter(Run.id == run_id, Run.cancel_requested_at.is_(None)).update(
+        {"cancel_requested_at": now}, synchronize_session=False
+    )
+    # Queued runs are cancelled here; the conditional update loses the race
+    # cleanly if a worker claims the run at the same moment.
+    cancelled_queued = (
+        db.query(Run)
+        .filter(Run.id == run_id, Run.status == "PENDING", Run.worker_id.is_(None))
+        .update({"status": "CANCELLED", "finished_at": now}, synchronize_session=False)
+    )
+    if cancelled_queued:
+        db.add(
+            StepLog(
+                run_id=run_id,
+                node_id=None,
+                status="CANCELLED",
+                message="Run cancelled before it started",
+                timestamp=now,
+            )
+        )
+    db.commit()
+    if cancelled_queued:
+        run_events.finish(run_id, "CANCELLED")
+    else:
+        # Interrupts the run right away when it executes in this process;
+        # elsewhere the engine or the worker heartbeat picks up the flag.
+        run_controls.cancel(run_id)
+    db.refresh(run)
+    return run
+
+
+@router.get("/{run_id}/logs", response_model=List[StepLogOut], response_class=FastJSONResponse)
+def get_run_logs(
+    run_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    run = db.query(Run.workflow_id).filter(Run.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    # Logs are append-only, so the newest log id identifies the rows; node names
+    # are read from the current graphs, so their workflow versions are part of
+    # the tag too.
+    last_log_id = db.query(func.max(StepLog.id)).filter(StepLog.run_id == run_id).scalar()
+    versions = (
+        db.query(Workflow.id, Workflow.version)
+        .filter(
+            or_(
+                Workflow.id == run.workflow_id,
+                Workflow.id.in_(db.query(StepLog.workflow_id).filter(StepLog.run_id == run_id)),
+            )
+        )
+        .order_by(Workflow.id)
+        .all()
+    )
+    graphs = "-".join(f"{row.id}.{row.version}" for row in versions)
+    etag = f'"run-{run_id}-{last_log_id or 0}-{graphs}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Rows are read as plain tuples and encoded directly; building ORM
+    # objects and Pydantic models per log dominates on long runs.
     logs = (
-        db.query(StepLog)
+        db.query(StepLog.id, StepLog.workflow_id, StepLog.node_id, StepLog.status, StepLog.message, StepLog.timestamp)
         .filter(StepLog.run_id == run_id)
         .order_by(StepLog.timestamp.asc())
         .all()
     )
 
-    node_ids = {log.node_id for log in logs if log.node_id is not None}
+    # Sub-workflow steps carry the callee's workflow id; the rest belong to the run's workflow.
+    node_keys = {(log.workflow_id or run.workflow_id, log.node_id) for log in logs if log.node_id is not None}
     node_map = {}
-    if node_ids:
+    if node_keys:
         nodes = (
-            db.query(Node)
-            .filter(Node.workflow_id == run.workflow_id, Node.id.in_(node_ids))
+            db.query(Node.workflow_id, Node.id, Node.name)
+            .filter(
+                Node.workflow_id.in_({workflow_id for workflow_id, _ in node_keys}),
+                Node.id.in_({node_id for _, node_id in node_keys}),
+            )
             .all()
         )
-        node_map = {node.id: node.name for node in nodes}
-
-    results = []
-    for log in logs:
-        results.append(
-            StepLogOut(
-                id=log.id,
-                node_id=log.node_id,
-                node_name=node_map.get(log.node_id),
-                status=log.status,
-                message=log.message,
-                timestamp=log.timestamp,
+        node_map = {(node.workflow_id, node.id): node.name for node in nodes}
+
+    results = [
+        {
+            "id": log.id,
+            "workflow_id": log.workflow_id,
+            "node_id": log.node_id,
+            "node_name": node_map.get((log.workflow_id or run.workflow_id, log.node_id)),
+            "status": log.status,
+            "message": log.message,
+            "timestamp": log.timestamp,
+        }
+        for log in logs
+    ]
+    return tagged_json(results, etag)
+
+
+def poll_run_events(
+    run_id: int,
+    session_factory: Callable[[], Session] = SessionLocal,
+    interval: float = 1.0,
+    idle_timeout: float = 15.0,
+) -> Iterator[Optional[Dict[str, Any]]]:
+    """Step and final status events for a run executing in another process, read from the database.
+
+    Yields None after each ``idle_timeout`` without news, like ``RunEventBus.subscribe``.
+    """
+    last_log_id = 0
+    idle_since = time.monotonic()
+    while True:
+        db = session_factory()
+        try:
+            status = db.query(Run.status).filter(Run.id == run_id).scalar()
+            logs = (
+                db.query(StepLog.id, StepLog.workflow_id, StepLog.node_id, StepLog.status, StepLog.message)
+                .filter(StepLog.run_id == run_id, StepLog.id > last_log_id)
+                .order_by(StepLog.id)
+                .all()
             )
-        )
+        finally:
+            db.close()
+        for log in logs:
+            last_log_id = log.id
+            if log.node_id is None:
+                continue
+            event = {"type": "step", "status": log.status, "message": log.message, "node_id": log.node_id}
+            if log.workflow_id is not None:
+                event["workflow_id"] = log.workflow_id
+            idle_since = time.monotonic()
+            yield event
+        if status is None:
+            return
+        if status in FINISHED_STATUSES:
+            yield {"type": "run", "status": status}
+            return
+        if time.monotonic() - idle_since >= idle_timeout:
+            idle_since = time.monotonic()
+            yield None
+        time.sleep(interval)
+
+
+@router.get("/{run_id}/events")
+def stream_run_events(run_id: int, db: Session = Depends(get_db)):
+    run = db.query(Run).filter(Run.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if run_events.has_channel(run_id) or run_id in run_controls:
+        events = run_events.subscribe(run_id)
+    elif run.status in FINISHED_STATUSES:
+        events = iter([{"type": "run", "status": run.status}])
+    else:
+        # Queued or executing in a worker process: nothing here will publish
+        # to an in-process channel, so follow the run through the database.
+        events = poll_run_events(run_id, interval=settings.run_events_poll_seconds)
+
+    def event_stream():
+        for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {dumps(event)}\n\n"
 
-    return results
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,13 +1,18 @@
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, selectinload
 
-from app.db.models import Edge, Node, Run, StepLog, Workflow
+from app.config import settings
+from app.db.models import Edge, Node, Run, Workflow
 from app.db.session import get_db
+from app.responses import FastJSONResponse, etag_matches, not_modified, tagged_json
 from app.schemas.run import RunCreate, RunOut
 from app.schemas.workflow import (
+    NodeOut,
+    NodeUpdate,
     WorkflowCreate,
     WorkflowGenerateRequest,
     WorkflowGenerateResponse,
@@ -15,9 +20,19 @@ from app.schemas.workflow import (
     WorkflowSummary,
     WorkflowUpdate,
 )
-from app.services.dag import validate_dag
-from app.services.workflow_generator import generate_workflow_from_prompt
-from app.services.workflow_engine import execute_workflow
+from app.services.dag import analyze_dag, validate_dag
+from app.services.idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyConflict,
+    check_fingerprint,
+    find_run,
+    request_fingerprint,
+    wait_for_run,
+)
+from app.services.node_types import node_types
+from app.services.run_executor import execute_run, executor_id
+from app.services.runtime import load_plan, plan_cache
+from app.services.workflow_store import bump_version, insert_graph, sync_graph
 
 router = APIRouter(prefix="/workflows", tags=["workflows"])
 
@@ -34,105 +49,163 @@ def get_workflow_or_404(db: Session, workflow_id: int) -> Workflow:
     return workflow
 
 
+def workflow_payload(db: Session, workflow_id: int) -> dict:
+    """Workflow graph as plain JSON-ready data, read without building ORM objects."""
+    workflow = (
+        db.query(Workflow.id, Workflow.name, Workflow.description, Workflow.max_concurrency, Workflow.created_at)
+        .filter(Workflow.id == workflow_id)
+        .first()
+    )
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    nodes = (
+        db.query(Node.id, Node.type, Node.name, Node.config)
+        .filter(Node.workflow_id == workflow_id)
+        .order_by(Node.id)
+        .all()
+    )
+    edges = (
+        db.query(Edge.id, Edge.from_node_id, Edge.to_node_id)
+        .filter(Edge.workflow_id == workflow_id)
+        .order_by(Edge.id)
+        .all()
+    )
+    return {
+        "id": workflow.id,
+        "name": workflow.name,
+        "description": workflow.description,
+        "max_concurrency": workflow.max_concurrency,
+        "created_at": workflow.created_at,
+        "nodes": [
+            {"id": node.id, "type": node.type, "name": node.name, "config": node.config or {}}
+            for node in nodes
+        ],
+        "edges": [
+            {"id": edge.id, "from_node_id": edge.from_node_id, "to_node_id": edge.to_node_id}
+            for edge in edges
+        ],
+    }
+
+
 @router.get("", response_model=List[WorkflowSummary])
 def list_workflows(db: Session = Depends(get_db)):
     return db.query(Workflow).order_by(Workflow.created_at.desc()).all()
 
 
-@router.post("", response_model=WorkflowOut, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=WorkflowOut,
+    response_class=FastJSONResponse,
+    status_code=status.HTTP_201_CREATED,
+)
 def create_workflow(payload: WorkflowCreate, db: Session = Depends(get_db)):
-    errors = validate_dag(payload.nodes, payload.edges)
+    errors = node_types.validate_nodes(payload.nodes) + validate_dag(payload.nodes, payload.edges)
     if errors:
         raise HTTPException(status_code=400, detail=errors)
 
-    workflow = Workflow(name=payload.name, description=payload.description)
+    workflow = Workflow(
+        name=payload.name,
+        description=payload.description,
+        max_concurrency=payload.max_concurrency,
+    )
     db.add(workflow)
     db.flush()
-
-    for node in payload.nodes:
-        db.add(
-            Node(
-                id=node.id,
-                workflow_id=workflow.id,
-                type=node.type,
-                config=node.config,
-                name=node.name,
-            )
-        )
-
-    for edge in payload.edges:
-        db.add(
-            Edge(
-                workflow_id=workflow.id,
-                from_node_id=edge.from_node_id,
-                to_node_id=edge.to_node_id,
-            )
-        )
-
+    insert_graph(db, workflow.id, payload.nodes, payload.edges)
     db.commit()
-    return get_workflow_or_404(db, workflow.id)
+    return FastJSONResponse(workflow_payload(db, workflow.id), status_code=status.HTTP_201_CREATED)
 
 
 @router.post("/generate", response_model=WorkflowGenerateResponse)
 def generate_workflow(payload: WorkflowGenerateRequest):
+    # Imported on first use: generation pulls in the HTTP client, which
+    # nothing else on the API startup path needs.
+    from app.services.workflow_generator import generate_workflow_from_prompt
+
     try:
         return generate_workflow_from_prompt(payload.prompt)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.get("/{workflow_id}", response_model=WorkflowOut)
-def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
-    return get_workflow_or_404(db, workflow_id)
+@router.get("/node-types")
+def list_node_types():
+    return [node_type.describe() for node_type in node_types]
+
+
+def workflow_etag(workflow_id: int, version: int, created_at: datetime) -> str:
+    # created_at tells apart workflows that reuse the id of a deleted one.
+    return f'"wf-{workflow_id}-{version}-{int(created_at.timestamp() * 1000000)}"'
 
 
-@router.put("/{workflow_id}", response_model=WorkflowOut)
+@router.get("/{workflow_id}", response_model=WorkflowOut, response_class=FastJSONResponse)
+def get_workflow(
+    workflow_id: int,
+    if_none_match: Optional[str] = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    # Every change to a workflow bumps its version, so the version row alone
+    # decides whether the client's copy is current.
+    row = db.query(Workflow.version, Workflow.created_at).filter(Workflow.id == workflow_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    etag = workflow_etag(workflow_id, row.version, row.created_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return tagged_json(workflow_payload(db, workflow_id), etag)
+
+
+@router.put("/{workflow_id}", response_model=WorkflowOut, response_class=FastJSONResponse)
 def update_workflow(workflow_id: int, payload: WorkflowUpdate, db: Session = Depends(get_db)):
-    workflow = get_workflow_or_404(db, workflow_id)
+    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    if not workflow:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    if payload.max_concurrency is not None:
+        workflow.max_concurrency = payload.max_concurrency or None
 
     if payload.nodes is None and payload.edges is None:
         if payload.name is not None:
             workflow.name = payload.name
         if payload.description is not None:
             workflow.description = payload.description
+        bump_version(db, workflow_id)
         db.commit()
-        return get_workflow_or_404(db, workflow_id)
+        return FastJSONResponse(workflow_payload(db, workflow_id))
 
     if payload.nodes is None or payload.edges is None:
         raise HTTPException(status_code=400, detail="Both nodes and edges are required when updating graph")
 
-    errors = validate_dag(payload.nodes, payload.edges)
+    errors = node_types.validate_nodes(payload.nodes) + validate_dag(payload.nodes, payload.edges)
     if errors:
         raise HTTPException(status_code=400, detail=errors)
 
     workflow.name = payload.name or workflow.name
     workflow.description = payload.description if payload.description is not None else workflow.description
-
-    db.query(Edge).filter(Edge.workflow_id == workflow_id).delete(synchronize_session=False)
-    db.query(Node).filter(Node.workflow_id == workflow_id).delete(synchronize_session=False)
-
-    for node in payload.nodes:
-        db.add(
-            Node(
-                id=node.id,
-                workflow_id=workflow_id,
-                type=node.type,
-                config=node.config,
-                name=node.name,
-            )
-        )
-
-    for edge in payload.edges:
-        db.add(
-            Edge(
-                workflow_id=workflow_id,
-                from_node_id=edge.from_node_id,
-                to_node_id=edge.to_node_id,
-            )
-        )
-
+    sync_graph(db, workflow_id, payload.nodes, payload.edges)
+    bump_version(db, workflow_id)
+    db.commit()
+    return FastJSONResponse(workflow_payload(db, workflow_id))
+
+
+@router.patch("/{workflow_id}/nodes/{node_id}", response_model=NodeOut)
+def update_node(workflow_id: int, node_id: int, payload: NodeUpdate, db: Session = Depends(get_db)):
+    node = db.query(Node).filter(Node.workflow_id == workflow_id, Node.id == node_id).first()
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+    if payload.type is not None:
+        node.type = payload.type
+    if payload.name is not None:
+        node.name = payload.name
+    if payload.config is not None:
+        node.config = payload.config
+    if payload.type is not None or payload.config is not None:
+        errors = node_types.validate_nodes([node])
+        if errors:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=errors)
+    bump_version(db, workflow_id)
     db.commit()
-    return get_workflow_or_404(db, workflow_id)
+    db.refresh(node)
+    return node
 
 
 @router.delete("/{workflow_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -140,48 +213,88 @@ def delete_workflow(workflow_id: int, db: Session = Depends(get_db)):
     workflow = get_workflow_or_404(db, workflow_id)
     db.delete(workflow)
     db.commit()
+    plan_cache.discard(workflow_id)
     return None
 
 
 @router.post("/{workflow_id}/validate")
 def validate_workflow(workflow_id: int, db: Session = Depends(get_db)):
     workflow = get_workflow_or_404(db, workflow_id)
-    errors = validate_dag(workflow.nodes, workflow.edges)
-    return {"valid": not errors, "errors": errors}
+    analysis = analyze_dag(workflow.nodes, workflow.edges)
+    errors = analysis.errors
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "cycles": analysis.cycles,
+        "blocked": analysis.blocked,
+        "unreachable": analysis.unreachable,
+    }
+
+
+def _replay_run(db: Session, run: Run, fingerprint: str, response: Response) -> Run:
+    try:
+        check_fingerprint(run, fingerprint)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    response.headers["Idempotent-Replayed"] = "true"
+    if settings.run_execution != "worker":
+        # The original request is still executing the run inline; answer
+        # the retry the way the original would be answered.
+        run = wait_for_run(db, run, settings.idempotency_wait_seconds)
+    return run
 
 
 @router.post("/{workflow_id}/run", response_model=RunOut)
-def run_workflow(workflow_id: int, payload: RunCreate, db: Session = Depends(get_db)):
-    workflow = get_workflow_or_404(db, workflow_id)
-    run = Run(workflow_id=workflow.id, status="PENDING", started_at=datetime.utcnow())
-    db.add(run)
-    db.commit()
-    db.refresh(run)
-
-    errors = validate_dag(workflow.nodes, workflow.edges)
-    if errors:
-        run.status = "FAILED"
-        run.finished_at = datetime.utcnow()
-        db.add(
-            StepLog(
-                run_id=run.id,
-                node_id=None,
-                status="FAILED",
-                message="Validation failed: " + "; ".join(errors),
-                timestamp=datetime.utcnow(),
-            )
+def run_workflow(
+    workflow_id: int,
+    payload: RunCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=MAX_KEY_LENGTH),
+    db: Session = Depends(get_db),
+):
+    if idempotency_key and payload.idempotency_key and idempotency_key != payload.idempotency_key:
+        raise HTTPException(status_code=400, detail="Idempotency-Key header and idempotency_key field differ")
+    key = idempotency_key or payload.idempotency_key
+    fingerprint = None
+    if key:
+        fingerprint = request_fingerprint(
+            {"run_input": payload.run_input, "priority": payload.priority, "deadline_seconds": payload.deadline_seconds}
         )
-        db.commit()
-        return run
-
-    run.status = "RUNNING"
-    db.commit()
+        existing = find_run(db, workflow_id, key)
+        if existing is not None:
+            return _replay_run(db, existing, fingerprint, response)
 
+    plan = load_plan(db, workflow_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    now = datetime.utcnow()
+    deadline_at = now + timedelta(seconds=payload.deadline_seconds) if payload.deadline_seconds else None
+    run = Run(
+        workflow_id=workflow_id,
+        status="PENDING",
+        priority=payload.priority,
+        queued_at=now,
+        run_input=payload.run_input,
+        deadline_at=deadline_at,
+        idempotency_key=key,
+        idempotency_fingerprint=fingerprint,
+    )
+    inline = settings.run_execution != "worker"
+    if inline:
+        # Inline runs start at once and bypass the worker scheduler, so they have no queue wait.
+        run.started_at = now
+        run.worker_id = executor_id("api")
+    db.add(run)
     try:
-        execute_workflow(db, workflow, run.id, payload.run_input)
-        run.status = "SUCCESS"
-    except Exception:
-        run.status = "FAILED"
-    run.finished_at = datetime.utcnow()
-    db.commit()
-    return run
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key inserted first.
+        db.rollback()
+        existing = find_run(db, workflow_id, key) if key else None
+        if existing is None:
+            raise
+        return _replay_run(db, existing, fingerprint, response)
+    db.refresh(run)
+    if not inline:
+        return run
+    return execute_run(db, run, plan, payload.run_input)
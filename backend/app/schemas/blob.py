@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class BlobOut(BaseModel):
+    blob: str
+    mime_type: str
+    size: int
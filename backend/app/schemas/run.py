@@ -1,19 +1,24 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Literal, Optional
 
 from pydantic import BaseModel, Field
 
 
 class RunCreate(BaseModel):
     run_input: Dict[str, Any] = Field(default_factory=dict)
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    priority: Literal["interactive", "batch", "background"] = "interactive"
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=255)
 
 
 class RunOut(BaseModel):
     id: int
     workflow_id: int
     status: str
+    priority: Optional[str] = None
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
+    queue_wait_seconds: Optional[float] = None
 
     class Config:
         orm_mode = True
@@ -27,6 +32,7 @@ class RunSummary(RunOut):
 
 class StepLogOut(BaseModel):
     id: int
+    workflow_id: Optional[int] = None
     node_id: Optional[int] = None
     node_name: Optional[str] = None
     status: str
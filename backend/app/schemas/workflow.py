@@ -20,6 +20,7 @@ class EdgeInput(BaseModel):
 class WorkflowCreate(BaseModel):
     name: str
     description: Optional[str] = None
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
     nodes: List[NodeInput]
     edges: List[EdgeInput]
 
@@ -27,10 +28,17 @@ class WorkflowCreate(BaseModel):
 class WorkflowUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    max_concurrency: Optional[int] = Field(default=None, ge=0)
     nodes: Optional[List[NodeInput]] = None
     edges: Optional[List[EdgeInput]] = None
 
 
+class NodeUpdate(BaseModel):
+    type: Optional[str] = None
+    name: Optional[str] = None
+    config: Optional[Dict[str, Any]] = None
+
+
 class NodeOut(NodeInput):
     class Config:
         orm_mode = True
@@ -45,6 +53,7 @@ class WorkflowSummary(BaseModel):
     id: int
     name: str
     description: Optional[str] = None
+    max_concurrency: Optional[int] = None
     created_at: datetime
 
     class Config:
@@ -0,0 +1,135 @@
+import base64
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+from app.config import settings
+
+BLOB_PREFIX = "sha256:"
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+def parse_ref(value: Any) -> Optional[str]:
+    """Digest named by a ``{"blob": "sha256:<hex>"}`` reference (or the bare string), else None."""
+    if isinstance(value, dict):
+        value = value.get("blob")
+    if not isinstance(value, str) or not value.startswith(BLOB_PREFIX):
+        return None
+    digest = value[len(BLOB_PREFIX):]
+    return digest if _DIGEST.match(digest) else None
+
+
+class BlobWriter:
+    """Hashes and writes an upload to a temp file; ``commit`` moves it to its content address."""
+
+    def __init__(self, store: "BlobStore", max_bytes: int) -> None:
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(prefix="upload-", dir=store.ensure_dir("tmp"), delete=False)
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise BlobTooLarge(f"Blob exceeds {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> str:
+        self._file.close()
+        digest = self._hash.hexdigest()
+        target = self.store.path(digest)
+        if os.path.exists(target):
+            os.unlink(self._file.name)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(self._file.name, target)
+        return digest
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
+
+
+class BlobImage(Mapping):
+    """Image payload backed by a stored blob.
+
+    Behaves like ``{"mime_type": ..., "data": <base64>}`` for the LLM
+    providers, but the file is only memory-mapped and encoded when ``data``
+    is read, i.e. when the request body is built.
+    """
+
+    __slots__ = ("digest", "mime_type", "_path")
+
+    def __init__(self, digest: str, mime_type: str, path: str) -> None:
+        self.digest = digest
+        self.mime_type = mime_type
+        self._path = path
+
+    def __getitem__(self, key: str) -> str:
+        if key == "mime_type":
+            return self.mime_type
+        if key == "data":
+            with open(self._path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return base64.b64encode(mapped).decode("ascii")
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("mime_type", "data"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __repr__(self) -> str:
+        return f"BlobImage({BLOB_PREFIX}{self.digest}, {self.mime_type})"
+
+
+class BlobStore:
+    """Content-addressed files under ``root``, stored as ``sha256/ab/<digest>``."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def ensure_dir(self, name: str) -> str:
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, "sha256", digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.isfile(self.path(digest))
+
+    def writer(self, max_bytes: int = 0) -> BlobWriter:
+        return BlobWriter(self, max_bytes)
+
+    def put(self, data: bytes) -> str:
+        writer = self.writer()
+        try:
+            writer.write(data)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def image(self, ref: Dict[str, Any]) -> BlobImage:
+        digest = parse_ref(ref)
+        if digest is None or not self.exists(digest):
+            raise ValueError(f"Blob '{ref.get('blob')}' not found")
+        return BlobImage(digest, ref.get("mime_type") or "application/octet-stream", self.path(digest))
+
+
+blob_store = BlobStore(settings.blob_dir)
@@ -1,6 +1,9 @@
-from collections import deque
+from array import array
+from collections import Counter
 from typing import List, Sequence
 
+MAX_REPORTED_CYCLES = 5
+
 
 def _get_value(item, name):
     if isinstance(item, dict):
@@ -8,68 +11,243 @@ def _get_value(item, name):
     return getattr(item, name)
 
 
-def validate_dag(nodes: Sequence, edges: Sequence) -> List[str]:
-    errors: List[str] = []
-    node_ids = []
-    seen = set()
-    duplicates = set()
-
-    for node in nodes:
-        node_id = _get_value(node, "id")
-        if node_id in seen:
-            duplicates.add(node_id)
-        else:
-            seen.add(node_id)
-            node_ids.append(node_id)
-
-    if duplicates:
-        errors.append(f"Duplicate node ids: {sorted(duplicates)}")
-
-    node_id_set = set(node_ids)
-    for edge in edges:
-        source = _get_value(edge, "from_node_id")
-        target = _get_value(edge, "to_node_id")
-        if source not in node_id_set or target not in node_id_set:
-            errors.append(
-                f"Edge refers to missing node(s): {source} -> {target}"
-            )
-
-    if errors:
+def _values(items: Sequence, name: str) -> List:
+    # Resolve the dict/attribute dispatch once per sequence rather than per
+    # element; mixed sequences fall back to the per-element path.
+    try:
+        if items and isinstance(items[0], dict):
+            return [item.get(name) for item in items]
+        return [getattr(item, name) for item in items]
+    except (TypeError, AttributeError):
+        return [_get_value(item, name) for item in items]
+
+
+class DagAnalysis:
+    """Result of one linear pass over a workflow graph.
+
+    Nodes are numbered by position and edges stored as CSR adjacency
+    (``offsets``/``targets``). ``order`` and ``levels`` cover every node that
+    can run; ``cycles`` lists one concrete path per strongly connected
+    component and ``blocked`` the nodes that only sit downstream of a cycle.
+    ``unreachable`` lists the nodes no path from a source node (one without
+    incoming edges) leads to, which only happens inside or behind a cycle
+    that nothing upstream enters.
+    """
+
+    __slots__ = (
+        "node_ids",
+        "offsets",
+        "targets",
+        "duplicates",
+        "missing_edges",
+        "order",
+        "levels",
+        "cycles",
+        "cycle_members",
+        "blocked",
+        "unreachable",
+    )
+
+    def __init__(self) -> None:
+        self.node_ids: List = []
+        self.offsets = array("l")
+        self.targets = array("l")
+        self.duplicates: List = []
+        self.missing_edges: List = []
+        self.order: List = []
+        self.levels = {}
+        self.cycles: List[List] = []
+        self.cycle_members: List = []
+        self.blocked: List = []
+        self.unreachable: List = []
+
+    @property
+    def has_cycle(self) -> bool:
+        return bool(self.cycles)
+
+    def cycle_message(self) -> str:
+        paths = [" -> ".join(str(node_id) for node_id in cycle + cycle[:1]) for cycle in self.cycles]
+        message = "Cycle detected in workflow DAG: " + "; ".join(paths[:MAX_REPORTED_CYCLES])
+        if len(paths) > MAX_REPORTED_CYCLES:
+            message += f" (and {len(paths) - MAX_REPORTED_CYCLES} more)"
+        if self.blocked:
+            message += f". Nodes blocked by the cycle: {sorted(self.blocked)}"
+        return message
+
+    @property
+    def errors(self) -> List[str]:
+        errors: List[str] = []
+        if self.duplicates:
+            errors.append(f"Duplicate node ids: {sorted(self.duplicates)}")
+        for source, target in self.missing_edges:
+            errors.append(f"Edge refers to missing node(s): {source} -> {target}")
+        if errors:
+            return errors
+        if self.cycles:
+            errors.append(self.cycle_message())
         return errors
 
-    try:
-        topological_sort(nodes, edges)
-    except ValueError as exc:
-        errors.append(str(exc))
 
-    return errors
+def analyze_dag(nodes: Sequence, edges: Sequence) -> DagAnalysis:
+    analysis = DagAnalysis()
+    node_ids = _values(nodes, "id")
+    # Number nodes 0..n-1 by first occurrence.
+    unique_ids = list(dict.fromkeys(node_ids))
+    if len(unique_ids) != len(node_ids):
+        counts = Counter(node_ids)
+        analysis.duplicates = sorted(node_id for node_id, seen in counts.items() if seen > 1)
+    index = dict(zip(unique_ids, range(len(unique_ids))))
+    analysis.node_ids = unique_ids
+    count = len(unique_ids)
+
+    source_ids = _values(edges, "from_node_id")
+    target_ids = _values(edges, "to_node_id")
+    sources = [index.get(node_id, -1) for node_id in source_ids]
+    targets = [index.get(node_id, -1) for node_id in target_ids]
+    if -1 in sources or -1 in targets:
+        analysis.missing_edges = [
+            (source_id, target_id)
+            for source_id, target_id, source, target in zip(source_ids, target_ids, sources, targets)
+            if source < 0 or target < 0
+        ]
+        kept = [(source, target) for source, target in zip(sources, targets) if source >= 0 and target >= 0]
+        sources = [source for source, _ in kept]
+        targets = [target for _, target in kept]
+
+    # CSR adjacency: sorted distinct edges are grouped by source, so each
+    # source's targets form one run starting at its offset.
+    distinct = sorted(set(zip(sources, targets)))
+    offsets = array("l", [0] * (count + 1))
+    indegree = [0] * count
+    for source, target in distinct:
+        offsets[source + 1] += 1
+        indegree[target] += 1
+    for position in range(count):
+        offsets[position + 1] += offsets[position]
+    adjacency = array("l", [target for _, target in distinct])
+    analysis.offsets = offsets
+    analysis.targets = adjacency
+
+    # Kahn's algorithm, tracking the longest-path level of each node.
+    level = [0] * count
+    queue = [position for position in range(count) if not indegree[position]]
+    append = queue.append
+    adjacency_list = adjacency.tolist()
+    offsets_list = offsets.tolist()
+    for position in queue:
+        next_level = level[position] + 1
+        for target in adjacency_list[offsets_list[position] : offsets_list[position + 1]]:
+            if level[target] < next_level:
+                level[target] = next_level
+            indegree[target] -= 1
+            if not indegree[target]:
+                append(target)
+    analysis.order = [unique_ids[position] for position in queue]
+    analysis.levels = {unique_ids[position]: level[position] for position in queue}
+
+    if len(queue) < count:
+        remaining = [position for position in range(count) if indegree[position] > 0]
+        components = _cyclic_components(remaining, offsets, adjacency)
+        members = set()
+        for component in components:
+            members.update(component)
+            cycle = _cycle_path(component, offsets, adjacency)
+            analysis.cycles.append([unique_ids[position] for position in cycle])
+        analysis.cycle_members = [unique_ids[position] for position in remaining if position in members]
+        analysis.blocked = [unique_ids[position] for position in remaining if position not in members]
+
+        # Everything Kahn's algorithm ordered hangs off a source; follow its
+        # edges into the cyclic part to find what no source reaches.
+        reached = [False] * count
+        for position in queue:
+            reached[position] = True
+        stack = list(queue)
+        while stack:
+            position = stack.pop()
+            for target in adjacency_list[offsets_list[position] : offsets_list[position + 1]]:
+                if not reached[target]:
+                    reached[target] = True
+                    stack.append(target)
+        analysis.unreachable = [unique_ids[position] for position in remaining if not reached[position]]
+    return analysis
+
+
+def _cyclic_components(remaining: List[int], offsets: array, adjacency: array) -> List[set]:
+    """Iterative Tarjan SCC over the nodes Kahn's algorithm could not order."""
+    allowed = set(remaining)
+    order_index = {}
+    lowlink = {}
+    on_stack = set()
+    stack: List[int] = []
+    components: List[set] = []
+    counter = 0
+
+    for root in remaining:
+        if root in order_index:
+            continue
+        work = [(root, offsets[root])]
+        order_index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            position, edge = work[-1]
+            if edge < offsets[position + 1]:
+                work[-1] = (position, edge + 1)
+                target = adjacency[edge]
+                if target not in allowed:
+                    continue
+                if target not in order_index:
+                    order_index[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, offsets[target]))
+                elif target in on_stack:
+                    lowlink[position] = min(lowlink[position], order_index[target])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[position])
+            if lowlink[position] == order_index[position]:
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.add(member)
+                    if member == position:
+                        break
+                is_self_loop = any(
+                    adjacency[edge] == position for edge in range(offsets[position], offsets[position + 1])
+                )
+                if len(component) > 1 or is_self_loop:
+                    components.append(component)
+    return components
+
+
+def _cycle_path(component: set, offsets: array, adjacency: array) -> List[int]:
+    """Follow edges inside a strongly connected component until a node repeats."""
+    start = min(component)
+    path: List[int] = []
+    seen = {}
+    position = start
+    while position not in seen:
+        seen[position] = len(path)
+        path.append(position)
+        for edge in range(offsets[position], offsets[position + 1]):
+            if adjacency[edge] in component:
+                position = adjacency[edge]
+                break
+    return path[seen[position]:]
+
+
+def validate_dag(nodes: Sequence, edges: Sequence) -> List[str]:
+    return analyze_dag(nodes, edges).errors
 
 
 def topological_sort(nodes: Sequence, edges: Sequence) -> List[int]:
-    node_ids = [_get_value(node, "id") for node in nodes]
-    adjacency = {node_id: set() for node_id in node_ids}
-    indegree = {node_id: 0 for node_id in node_ids}
-
-    for edge in edges:
-        source = _get_value(edge, "from_node_id")
-        target = _get_value(edge, "to_node_id")
-        if source in adjacency and target in adjacency:
-            if target not in adjacency[source]:
-                adjacency[source].add(target)
-                indegree[target] += 1
-
-    queue = deque([node_id for node_id, degree in indegree.items() if degree == 0])
-    order: List[int] = []
-
-    while queue:
-        node_id = queue.popleft()
-        order.append(node_id)
-        for neighbor in adjacency[node_id]:
-            indegree[neighbor] -= 1
-            if indegree[neighbor] == 0:
-                queue.append(neighbor)
-
-    if len(order) != len(node_ids):
-        raise ValueError("Cycle detected in workflow DAG")
-
-    return order
+    analysis = analyze_dag(nodes, edges)
+    if analysis.has_cycle:
+        raise ValueError(analysis.cycle_message())
+    return analysis.order
@@ -0,0 +1,48 @@
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Run
+from app.services.run_events import run_events
+from app.services.run_executor import FINISHED_STATUSES
+from app.services.serialization import dumps_bytes
+
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.25
+
+
+class IdempotencyConflict(ValueError):
+    """The key was already used for a request with a different body."""
+
+
+def request_fingerprint(request: Dict[str, Any]) -> str:
+    return hashlib.sha256(dumps_bytes(request, sort_keys=True)).hexdigest()
+
+
+def find_run(db: Session, workflow_id: int, key: str) -> Optional[Run]:
+    return db.query(Run).filter(Run.workflow_id == workflow_id, Run.idempotency_key == key).first()
+
+
+def check_fingerprint(run: Run, fingerprint: str) -> None:
+    if run.idempotency_fingerprint and run.idempotency_fingerprint != fingerprint:
+        raise IdempotencyConflict("Idempotency-Key was already used with a different request body")
+
+
+def wait_for_run(db: Session, run: Run, timeout: float) -> Run:
+    """Wait until ``run`` finishes or ``timeout`` seconds pass, then return it refreshed.
+
+    Runs executing in this process are awaited on their event channel;
+    others are polled from the database.
+    """
+    deadline = time.monotonic() + timeout
+    while run.status not in FINISHED_STATUSES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        step = min(POLL_SECONDS, remaining)
+        if not run_events.wait_closed(run.id, step) and not run_events.has_channel(run.id):
+            time.sleep(step)
+        db.refresh(run)
+    return run
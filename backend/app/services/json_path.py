@@ -0,0 +1,84 @@
+"""A small JSONPath subset for projecting node outputs.
+
+Supported: ``$`` (optional root), ``.key``, ``['key']``, ``[0]``, ``[-1]``,
+``[*]`` and ``.*``. A path with a wildcard yields a list of every match;
+a path without one yields the single match, or None when it is missing.
+"""
+
+import re
+from typing import Any, List, Tuple, Union
+
+Step = Union[str, int, None]  # None is a wildcard
+
+_TOKEN = re.compile(r"""\.(\*|[A-Za-z_$][\w$-]*)|\[(\*|-?\d+|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")\]""")
+
+
+def compile_path(expression: str) -> Tuple[Step, ...]:
+    """Parse ``expression`` into steps; raises ValueError on invalid syntax."""
+    if not isinstance(expression, str) or not expression.strip():
+        raise ValueError("path must be a non-empty string")
+    text = expression.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    elif not text.startswith("["):
+        text = "." + text
+    steps: List[Step] = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"invalid path '{expression}' at position {position}")
+        name, bracket = match.groups()
+        if name is not None:
+            steps.append(None if name == "*" else name)
+        elif bracket == "*":
+            steps.append(None)
+        elif bracket[0] in "'\"":
+            steps.append(re.sub(r"\\(.)", r"\1", bracket[1:-1]))
+        else:
+            steps.append(int(bracket))
+        position = match.end()
+    return tuple(steps)
+
+
+def has_wildcard(steps: Tuple[Step, ...]) -> bool:
+    return any(step is None for step in steps)
+
+
+def _children(value: Any) -> List[Any]:
+    if isinstance(value, dict):
+        return list(value.values())
+    if isinstance(value, list):
+        return value
+    return []
+
+
+def _step(value: Any, step: Step) -> Tuple[bool, Any]:
+    if isinstance(step, int):
+        if isinstance(value, list) and -len(value) <= step < len(value):
+            return True, value[step]
+        return False, None
+    if isinstance(value, dict) and step in value:
+        return True, value[step]
+    return False, None
+
+
+def select(value: Any, steps: Tuple[Step, ...]) -> Any:
+    if not has_wildcard(steps):
+        for step in steps:
+            found, value = _step(value, step)
+            if not found:
+                return None
+        return value
+    current = [value]
+    for step in steps:
+        following = []
+        for item in current:
+            if step is None:
+                following.extend(_children(item))
+            else:
+                found, child = _step(item, step)
+                if found:
+                    following.append(child)
+        current = following
+    return current
@@ -0,0 +1,305 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.services.rate_limit import llm_limiter
+from app.services.run_control import RunControl
+from app.services.serialization import dumps, dumps_bytes, loads
+from app.services.single_flight import llm_flight
+
+LLMRequest = Tuple[str, Dict[str, Any], Optional[Dict[str, str]]]
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class LLMProvider:
+    name = "llm"
+    supports_batching = False
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        raise NotImplementedError
+
+    def generate_in_run(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        image: Optional[Dict[str, str]] = None,
+        control: Optional[RunControl] = None,
+    ) -> Any:
+        """generate() for a run step; providers that wait on other calls stop waiting once ``control`` is cancelled."""
+        return self.generate(prompt, context, image=image)
+
+    def stream(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        """Yield text chunks as they are produced; falls back to one chunk from generate()."""
+        result = self.generate(prompt, context, image=image)
+        if isinstance(result, dict) and isinstance(result.get("text"), str):
+            yield result["text"]
+        else:
+            try:
+                yield dumps(result)
+            except TypeError:
+                yield str(result)
+
+    def generate_batch(self, requests: List[LLMRequest]) -> List[Any]:
+        """Return one result (or exception instance) per request, in order."""
+        results: List[Any] = []
+        for prompt, context, image in requests:
+            try:
+                results.append(self.generate(prompt, context, image=image))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+
+class DummyLLMProvider(LLMProvider):
+    name = "dummy"
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        return {"prompt": prompt, "context": context, "provider": "dummy"}
+
+
+class GeminiLLMProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: str, model: str) -> None:
+        self.api_key = api_key
+        self.model = model
+
+    def _payload(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        parts = [{"text": f"{prompt}\n\nContext:\n{dumps(context)}"}]
+        if image:
+            parts.append(
+                {
+                    "inlineData": {
+                        "mimeType": image["mime_type"],
+                        "data": image["data"],
+                    }
+                }
+            )
+        return {"contents": [{"role": "user", "parts": parts}]}
+
+    @staticmethod
+    def _candidate_text(data: Dict[str, Any]) -> str:
+        candidates = data.get("candidates") or []
+        if not candidates:
+            return ""
+        content = candidates[0].get("content", {})
+        parts = content.get("parts") or []
+        return parts[0].get("text", "") if parts else ""
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        payload = self._payload(prompt, context, image)
+        url = f"{settings.gemini_api_base}{self.model}:generateContent?key={self.api_key}"
+        with llm_limiter.limit(self.model):
+            response = httpx.post(url, content=dumps_bytes(payload), headers=JSON_HEADERS, timeout=20.0)
+        response.raise_for_status()
+        data = loads(response.content)
+        if not data.get("candidates"):
+            return {"provider": "gemini", "text": "", "raw": data}
+        return {"provider": "gemini", "text": self._candidate_text(data)}
+
+    def stream(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        payload = self._payload(prompt, context, image)
+        url = f"{settings.gemini_api_base}{self.model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        with llm_limiter.limit(self.model):
+            with httpx.stream("POST", url, content=dumps_bytes(payload), headers=JSON_HEADERS, timeout=20.0) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = self._candidate_text(loads(line[5:]))
+                    if text:
+                        yield text
+
+
+class CoalescingLLMProvider(LLMProvider):
+    """Shares one in-flight generate call between identical concurrent requests."""
+
+    def __init__(self, provider: LLMProvider) -> None:
+        self.provider = provider
+        self.name = provider.name
+
+    def _key(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]]) -> str:
+        digest = hashlib.sha256()
+        digest.update(type(self.provider).__name__.encode())
+        digest.update(str(getattr(self.provider, "model", "")).encode())
+        digest.update(prompt.encode())
+        try:
+            digest.update(dumps_bytes(context, sort_keys=True))
+        except TypeError:
+            digest.update(repr(context).encode())
+        if image:
+            digest.update(image["mime_type"].encode())
+            blob_digest = getattr(image, "digest", None)
+            digest.update(blob_digest.encode() if blob_digest else image["data"].encode())
+        return digest.hexdigest()
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        return self.generate_in_run(prompt, context, image=image)
+
+    def generate_in_run(
+        self,
+        prompt: str,
+        context: Dict[str, Any],
+        image: Optional[Dict[str, str]] = None,
+        control: Optional[RunControl] = None,
+    ) -> Any:
+        key = self._key(prompt, context, image)
+        return llm_flight.do(key, lambda: self.provider.generate(prompt, context, image=image), control)
+
+    def stream(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        return self.provider.stream(prompt, context, image=image)
+
+
+class FakeBatchLLMProvider(LLMProvider):
+    """Offline provider that answers whole batches locally and records batch sizes."""
+
+    name = "fake"
+    supports_batching = True
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.model = "fake"
+        self.latency_seconds = latency_seconds
+        self.batch_sizes: List[int] = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        return self.generate_batch([(prompt, context, image)])[0]
+
+    def generate_batch(self, requests: List[LLMRequest]) -> List[Any]:
+        with self._lock:
+            self.batch_sizes.append(len(requests))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [
+            {"provider": "fake", "text": prompt, "batch_size": len(requests)}
+            for prompt, _context, _image in requests
+        ]
+
+    def stream(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        for index, word in enumerate(prompt.split(" ")):
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds)
+            yield word if index == 0 else f" {word}"
+
+
+class _BatchItem:
+    __slots__ = ("request", "event", "leader", "done", "result", "error")
+
+    def __init__(self, request: LLMRequest) -> None:
+        self.request = request
+        self.event = threading.Event()
+        self.leader = False
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class BatchingLLMProvider(LLMProvider):
+    """Micro-batches concurrent generate calls for providers that support batching.
+
+    The first caller to arrive leads a batch: it waits up to ``window_seconds``
+    (or until ``max_batch_size`` prompts are queued), sends them with one
+    ``generate_batch`` call and hands each waiter its own result.
+    """
+
+    def __init__(self, provider: LLMProvider, max_batch_size: int = 8, window_seconds: float = 0.01) -> None:
+        self.provider = provider
+        self.name = provider.name
+        self.model = getattr(provider, "model", "")
+        self.max_batch_size = max(max_batch_size, 1)
+        self.window_seconds = max(window_seconds, 0.0)
+        self._pending: List[_BatchItem] = []
+        self._cond = threading.Condition()
+
+    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
+        if not self.provider.supports_batching or self.max_batch_size == 1:
+            return self.provider.generate(prompt, context, image=image)
+
+        item = _BatchItem((prompt, context, image))
+        with self._cond:
+            self._pending.append(item)
+            if len(self._pending) == 1:
+                item.leader = True
+            elif len(self._pending) >= self.max_batch_size:
+                self._cond.notify_all()
+
+        while not item.done:
+            if item.leader:
+                item.leader = False
+                self._lead()
+            else:
+                item.event.wait()
+                item.event.clear()
+
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def stream(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Iterator[str]:
+        return self.provider.stream(prompt, context, image=image)
+
+    def _lead(self) -> None:
+        deadline = time.monotonic() + self.window_seconds
+        with self._cond:
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            if self._pending:
+                successor = self._pending[0]
+                successor.leader = True
+                successor.event.set()
+        self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_BatchItem]) -> None:
+        try:
+            results = self.provider.generate_batch([item.request for item in batch])
+            if len(results) != len(batch):
+                raise ValueError("LLM batch returned a different number of results than prompts")
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for item, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                item.error = result
+            else:
+                item.result = result
+            item.done = True
+            item.event.set()
+
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def build_llm_provider() -> LLMProvider:
+    if settings.llm_provider == "fake":
+        provider: LLMProvider = FakeBatchLLMProvider()
+    elif settings.gemini_api_key:
+        provider = GeminiLLMProvider(settings.gemini_api_key, settings.gemini_model)
+    else:
+        return DummyLLMProvider()
+    if settings.llm_batch_max_size > 1 and provider.supports_batching:
+        provider = BatchingLLMProvider(
+            provider,
+            max_batch_size=settings.llm_batch_max_size,
+            window_seconds=settings.llm_batch_window_ms / 1000.0,
+        )
+    return CoalescingLLMProvider(provider)
+
+
+def get_llm_provider() -> LLMProvider:
+    """Process-wide provider so coalescing and batching span concurrent runs."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = build_llm_provider()
+        return _provider
@@ -0,0 +1,73 @@
+from typing import Any, Dict
+
+from app.services.runtime import RuntimeNode
+from app.services.templates import format_template
+from app.services.workflow_engine import RunState, evaluate_condition, resolve_output_selection
+
+
+def execute_input(node: RuntimeNode, state: RunState) -> Any:
+    config = node.config
+    run_input = state.run_input
+    key = config.get("key")
+    has_value = "value" in config
+    if key:
+        if key in run_input:
+            return run_input[key]
+        if has_value:
+            run_input[key] = config.get("value")
+            return config.get("value")
+        raise ValueError(f"INPUT key '{key}' not found in run input")
+    if has_value:
+        return config.get("value")
+    return run_input
+
+
+def execute_transform(node: RuntimeNode, state: RunState) -> Any:
+    template = node.config.get("template")
+    if not template:
+        raise ValueError("TRANSFORM node requires a template")
+    return format_template(template, state.context())
+
+
+def execute_output(node: RuntimeNode, state: RunState) -> Any:
+    select = node.config.get("select")
+    if not select:
+        return dict(state.outputs)
+    aggregated: Dict[str, Any] = {}
+    for item in select:
+        aggregated[str(item)] = resolve_output_selection(item, state.plan.name_to_id, state.outputs)
+    return aggregated
+
+
+def execute_merge(node: RuntimeNode, state: RunState) -> Any:
+    config = node.config
+    sources = config.get("sources") or []
+    key_by = config.get("key_by", "name")
+    aggregated: Dict[str, Any] = {}
+    if not sources:
+        sources = list(state.outputs.keys())
+    for item in sources:
+        output = resolve_output_selection(item, state.plan.name_to_id, state.outputs)
+        key = str(item)
+        if key_by == "name" and (isinstance(item, int) or (isinstance(item, str) and item.isdigit())):
+            source = state.plan.nodes.get(int(item))
+            if source:
+                key = source.name
+        aggregated[key] = output
+    return aggregated
+
+
+def execute_delay(node: RuntimeNode, state: RunState) -> Any:
+    seconds = node.config.get("seconds", 1)
+    try:
+        delay = float(seconds)
+    except (TypeError, ValueError):
+        raise ValueError("DELAY seconds must be a number")
+    if delay < 0:
+        raise ValueError("DELAY seconds must be non-negative")
+    state.control.wait(min(delay, 30))
+    return {"delayed_seconds": delay}
+
+
+def execute_condition(node: RuntimeNode, state: RunState) -> Any:
+    return evaluate_condition(node.config, state.context())
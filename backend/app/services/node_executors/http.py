@@ -0,0 +1,127 @@
+from typing import Any, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.services.json_path import Step, compile_path, select
+from app.services.llm_providers import JSON_HEADERS
+from app.services.rate_limit import http_limiter
+from app.services.runtime import RuntimeNode
+from app.services.serialization import dumps, dumps_bytes, loads
+from app.services.single_flight import http_flight
+from app.services.workflow_engine import RunState
+
+
+RESPONSE_FORMATS = ("auto", "json", "ndjson", "text")
+
+
+def _too_large(max_bytes: int) -> ValueError:
+    return ValueError(f"HTTP response exceeds {max_bytes} bytes")
+
+
+def _iter_body(response: httpx.Response, max_bytes: int) -> Iterator[bytes]:
+    length = response.headers.get("content-length")
+    if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+        raise _too_large(max_bytes)
+    size = 0
+    for chunk in response.iter_bytes():
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+
+
+def _iter_ndjson(response: httpx.Response, max_bytes: int) -> Iterator[Any]:
+    pending = b""
+    for chunk in _iter_body(response, max_bytes):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield loads(line)
+    if pending.strip():
+        yield loads(pending)
+
+
+def _detect_format(response: httpx.Response) -> str:
+    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type.endswith(("ndjson", "jsonl", "jsonlines")):
+        return "ndjson"
+    if content_type.endswith("json"):
+        return "json"
+    return "auto"
+
+
+def read_response(
+    response: httpx.Response, response_format: str, max_bytes: int, path: Optional[Tuple[Step, ...]]
+) -> Any:
+    """Read a streamed response within ``max_bytes`` and keep only the ``path`` projection.
+
+    NDJSON records are parsed as they arrive; with a path starting at ``[*]``
+    each record is projected before the next one is read.
+    """
+    if response_format == "auto":
+        response_format = _detect_format(response)
+    if response_format == "ndjson":
+        if path and path[0] is None:
+            return [select(record, path[1:]) for record in _iter_ndjson(response, max_bytes)]
+        records = list(_iter_ndjson(response, max_bytes))
+        return select(records, path) if path else records
+    body = b"".join(_iter_body(response, max_bytes))
+    if response_format == "text":
+        value: Any = body.decode(response.charset_encoding or "utf-8", errors="replace")
+    elif response_format == "json":
+        value = loads(body)
+    else:
+        try:
+            value = loads(body)
+        except ValueError:
+            value = body.decode(response.charset_encoding or "utf-8", errors="replace")
+    return select(value, path) if path else value
+
+
+def execute_http(node: RuntimeNode, state: RunState) -> Any:
+    config = node.config
+    url = config.get("url")
+    if not url:
+        raise ValueError("HTTP node requires a url")
+    method = (config.get("method") or "GET").upper()
+    if method not in {"GET", "POST", "PUT", "DELETE", "PATCH"}:
+        raise ValueError("HTTP method must be GET, POST, PUT, DELETE, or PATCH")
+    body = config.get("body")
+    json_body = None
+    data_body = None
+    if body is not None:
+        if isinstance(body, (dict, list)):
+            json_body = body
+        elif isinstance(body, str):
+            try:
+                json_body = loads(body)
+            except ValueError:
+                data_body = body
+
+    max_bytes = int(config.get("max_bytes", settings.http_max_response_bytes) or 0)
+    response_format = (config.get("response_format") or "auto").lower()
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f"HTTP response_format must be one of {', '.join(RESPONSE_FORMATS)}")
+    path = compile_path(config["select"]) if config.get("select") else None
+
+    def send() -> Any:
+        with http_limiter.limit(urlsplit(url).netloc.lower()):
+            with httpx.stream(
+                method,
+                url,
+                content=dumps_bytes(json_body) if json_body is not None else None,
+                headers=JSON_HEADERS if json_body is not None else None,
+                data=data_body,
+                timeout=state.control.timeout(10.0),
+            ) as response:
+                response.raise_for_status()
+                return read_response(response, response_format, max_bytes, path)
+
+    if method == "GET":
+        body_key = dumps(json_body, sort_keys=True) if json_body is not None else data_body
+        key = (method, url, body_key, response_format, max_bytes, config.get("select"))
+        return http_flight.do(key, send, state.control)
+    return send()
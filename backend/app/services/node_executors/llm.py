@@ -0,0 +1,96 @@
+import re
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from app.config import settings
+from app.services.blob_store import blob_store
+from app.services.llm_providers import LLMProvider
+from app.services.run_control import RunControl
+from app.services.runtime import RuntimeNode
+from app.services.templates import format_template
+from app.services.workflow_engine import RunState
+
+
+def parse_image_payload(value: Any) -> Optional[Mapping[str, str]]:
+    if not value:
+        return None
+    if isinstance(value, dict):
+        if "blob" in value:
+            return blob_store.image(value)
+        if "data_url" in value:
+            return parse_image_payload(value["data_url"])
+        if "dataUrl" in value:
+            return parse_image_payload(value["dataUrl"])
+        if "mime_type" in value and "data" in value:
+            return {"mime_type": value["mime_type"], "data": value["data"]}
+        if "mime_type" in value and "base64" in value:
+            return {"mime_type": value["mime_type"], "data": value["base64"]}
+    if isinstance(value, str):
+        if value.startswith("data:"):
+            match = re.match(r"data:([^;]+);base64,(.+)", value)
+            if match:
+                return {"mime_type": match.group(1), "data": match.group(2)}
+        return {"mime_type": "image/png", "data": value}
+    return None
+
+
+def stream_llm_output(
+    llm_provider: LLMProvider,
+    prompt: str,
+    context: Dict[str, Any],
+    image: Optional[Mapping[str, str]],
+    max_bytes: int,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+    control: Optional[RunControl] = None,
+) -> Dict[str, Any]:
+    chunks = []
+    size = 0
+    truncated = False
+    stream = llm_provider.stream(prompt, context, image=image)
+    try:
+        for chunk in stream:
+            if control is not None:
+                control.check()
+            if max_bytes:
+                remaining = max_bytes - size
+                encoded = chunk.encode("utf-8")
+                if len(encoded) > remaining:
+                    chunk = encoded[:remaining].decode("utf-8", errors="ignore")
+                    truncated = True
+            chunks.append(chunk)
+            size += len(chunk.encode("utf-8"))
+            if emit is not None and chunk:
+                emit({"type": "llm.delta", "text": chunk})
+            if truncated:
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return {"provider": llm_provider.name, "text": "".join(chunks), "truncated": truncated}
+
+
+def execute_llm(node: RuntimeNode, state: RunState) -> Any:
+    config = node.config
+    prompt = config.get("prompt")
+    if not prompt:
+        raise ValueError("LLM node requires a prompt")
+    context = dict(state.context())
+    image_key = config.get("image_key")
+    if image_key and image_key in context:
+        context = {**context, image_key: "<image>"}
+    rendered = format_template(prompt, context)
+    image_payload = None
+    if image_key:
+        image_value = state.run_input.get(image_key)
+        if image_value is None:
+            image_value = context.get(image_key)
+        image_payload = parse_image_payload(image_value)
+        if not image_payload:
+            raise ValueError(f"Image key '{image_key}' not found or invalid")
+    llm_provider = state.llm_provider
+    if config.get("stream", settings.llm_stream):
+        max_bytes = int(config.get("max_output_bytes") or settings.llm_stream_max_bytes)
+        return stream_llm_output(
+            llm_provider, rendered, context, image_payload, max_bytes, state.emit, state.control
+        )
+    return llm_provider.generate_in_run(rendered, context, image=image_payload, control=state.control)
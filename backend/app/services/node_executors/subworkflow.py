@@ -0,0 +1,69 @@
+from typing import Any, Dict, Tuple
+
+from app.config import settings
+from app.services.output_store import OutputStore
+from app.services.runtime import RuntimeNode, RuntimePlan, load_plan
+from app.services.workflow_engine import RunState, resolve_value, run_steps
+
+
+def _callee_input(config: Dict[str, Any], state: RunState) -> Dict[str, Any]:
+    mapping = config.get("inputs")
+    if mapping is None:
+        return dict(state.run_input)
+    context = state.context()
+    return {key: resolve_value(value, context) for key, value in mapping.items()}
+
+
+def _result_nodes(plan: RuntimePlan, config: Dict[str, Any]) -> Tuple[int, ...]:
+    mapping = config.get("outputs")
+    if mapping:
+        selected = []
+        for selection in mapping.values():
+            if isinstance(selection, str) and selection.isdigit():
+                selection = int(selection)
+            node_id = selection if isinstance(selection, int) else plan.name_to_id.get(selection)
+            if node_id not in plan.nodes:
+                raise ValueError(f"Unknown node in sub-workflow {plan.workflow_id} outputs: {selection}")
+            selected.append(node_id)
+        return tuple(selected)
+    output_ids = tuple(node_id for node_id in plan.order if plan.nodes[node_id].type == "OUTPUT")
+    return output_ids or plan.order[-1:]
+
+
+def execute_subworkflow(node: RuntimeNode, state: RunState) -> Any:
+    """Run another stored workflow inline, from its cached plan, as one step of this run.
+
+    Without ``outputs`` the result is the callee's OUTPUT node value (a dict by
+    node name when it has several); with it, a dict of the selected outputs.
+    """
+    config = node.config
+    workflow_id = config.get("workflow_id")
+    if not isinstance(workflow_id, int) or isinstance(workflow_id, bool):
+        raise ValueError("SUBWORKFLOW node requires an integer workflow_id")
+    stack = state.stack + (state.plan.workflow_id,)
+    if workflow_id in stack:
+        path = " -> ".join(str(item) for item in stack + (workflow_id,))
+        raise ValueError(f"Sub-workflow cycle: {path}")
+    if len(stack) > settings.subworkflow_max_depth:
+        raise ValueError(f"Sub-workflow nesting exceeds {settings.subworkflow_max_depth} levels")
+    if state.db is None:
+        raise ValueError("SUBWORKFLOW node requires a database session")
+
+    plan = load_plan(state.db, workflow_id)
+    if plan is None:
+        raise ValueError(f"Sub-workflow {workflow_id} not found")
+    if plan.errors:
+        raise ValueError(f"Sub-workflow {workflow_id} is invalid: {'; '.join(plan.errors)}")
+
+    result_ids = _result_nodes(plan, config)
+    outputs = OutputStore(settings.output_spill_bytes, settings.output_spill_dir)
+    try:
+        run_steps(state.child(plan, outputs, _callee_input(config, state)), keep=result_ids)
+        mapping = config.get("outputs")
+        if mapping:
+            return {key: outputs[node_id] for key, node_id in zip(mapping, result_ids)}
+        if len(result_ids) == 1:
+            return outputs[result_ids[0]]
+        return {plan.nodes[node_id].name: outputs[node_id] for node_id in result_ids}
+    finally:
+        outputs.close()
@@ -0,0 +1,318 @@
+"""Registry of workflow node types.
+
+Each type declares its config schema, a validator used for generated and
+submitted workflows and its executor. Types that need context a model
+cannot know, such as the ids of stored workflows, are registered with
+``generatable=False`` and are left out of workflow generation. Executors may
+be given as ``"module:function"`` strings so heavy dependencies such as HTTP
+or LLM clients are only imported on first use. Executors are called as
+``executor(node, state)``; coroutine functions are run to completion on the
+calling thread.
+"""
+
+import asyncio
+import importlib
+import inspect
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from app.services.json_path import compile_path
+
+Validator = Callable[[Any, Dict[str, Any]], List[str]]
+
+EXECUTORS_PACKAGE = "app.services.node_executors"
+
+
+class NodeType:
+    __slots__ = (
+        "name",
+        "config_schema",
+        "hint",
+        "generatable",
+        "_validator",
+        "_executor_ref",
+        "_executor",
+        "_is_async",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        executor: Union[str, Callable],
+        config_schema: Optional[Dict[str, Any]] = None,
+        validator: Optional[Validator] = None,
+        hint: str = "",
+        generatable: bool = True,
+    ) -> None:
+        self.name = name.upper()
+        self.config_schema = config_schema or {"type": "object"}
+        self.hint = hint
+        self.generatable = generatable
+        self._validator = validator
+        self._executor_ref = executor
+        self._executor: Optional[Callable] = None if isinstance(executor, str) else executor
+        self._is_async = False if self._executor is None else inspect.iscoroutinefunction(self._executor)
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._executor is not None
+
+    def executor(self) -> Callable:
+        """Resolve the executor, importing its module on first use."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    module_name, _, attr = self._executor_ref.partition(":")
+                    executor = getattr(importlib.import_module(module_name), attr)
+                    self._is_async = inspect.iscoroutinefunction(executor)
+                    self._executor = executor
+        return self._executor
+
+    def execute(self, node, state) -> Any:
+        executor = self.executor()
+        if self._is_async:
+            return asyncio.run(executor(node, state))
+        return executor(node, state)
+
+    def validate(self, node_id: Any, config: Dict[str, Any]) -> List[str]:
+        if self._validator is None:
+            return []
+        return self._validator(node_id, config)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "type": self.name,
+            "config_schema": self.config_schema,
+            "generatable": self.generatable,
+        }
+
+
+class NodeTypeRegistry:
+    def __init__(self) -> None:
+        self._types: Dict[str, NodeType] = {}
+
+    def register(self, node_type: NodeType) -> NodeType:
+        if node_type.name in self._types:
+            raise ValueError(f"Node type already registered: {node_type.name}")
+        self._types[node_type.name] = node_type
+        return node_type
+
+    def get(self, name: Any) -> Optional[NodeType]:
+        if not isinstance(name, str):
+            return None
+        return self._types.get(name)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self._types
+
+    def __iter__(self) -> Iterator[NodeType]:
+        return iter(self._types.values())
+
+    def names(self) -> List[str]:
+        return list(self._types)
+
+    def validate_nodes(self, nodes: Iterable) -> List[str]:
+        """Config errors for submitted nodes (objects with ``id``, ``type`` and ``config``)."""
+        errors: List[str] = []
+        for node in nodes:
+            node_type = self.get(node.type.upper() if isinstance(node.type, str) else node.type)
+            if node_type is None:
+                errors.append(f"Unsupported node type: {node.type}")
+            else:
+                errors.extend(node_type.validate(node.id, node.config or {}))
+        return errors
+
+
+def _optional_list(node_type: str, field: str) -> Validator:
+    def validate(node_id: Any, config: Dict[str, Any]) -> List[str]:
+        value = config.get(field)
+        if value is not None and not isinstance(value, list):
+            return [f"{node_type} node {node_id} {field} must be a list"]
+        return []
+
+    return validate
+
+
+def _validate_string_field(node_type: str, field: str) -> Validator:
+    def validate(node_id: Any, config: Dict[str, Any]) -> List[str]:
+        if not isinstance(config.get(field), str):
+            return [f"{node_type} node {node_id} requires {field} string"]
+        return []
+
+    return validate
+
+
+def _validate_condition(node_id: Any, config: Dict[str, Any]) -> List[str]:
+    errors = []
+    if "left" not in config or "right" not in config:
+        errors.append(f"CONDITION node {node_id} requires left and right values")
+    if not isinstance(config.get("operator"), str):
+        errors.append(f"CONDITION node {node_id} requires operator string")
+    return errors
+
+
+def _validate_http(node_id: Any, config: Dict[str, Any]) -> List[str]:
+    errors = _validate_string_field("HTTP", "url")(node_id, config)
+    if config.get("select") is not None:
+        try:
+            compile_path(config["select"])
+        except ValueError as exc:
+            errors.append(f"HTTP node {node_id} select {exc}")
+    response_format = config.get("response_format")
+    if response_format is not None and response_format not in {"auto", "json", "ndjson", "text"}:
+        errors.append(f"HTTP node {node_id} response_format must be auto, json, ndjson or text")
+    max_bytes = config.get("max_bytes")
+    if max_bytes is not None and (not isinstance(max_bytes, int) or isinstance(max_bytes, bool) or max_bytes < 0):
+        errors.append(f"HTTP node {node_id} max_bytes must be a non-negative integer")
+    return errors
+
+
+def _validate_delay(node_id: Any, config: Dict[str, Any]) -> List[str]:
+    seconds = config.get("seconds")
+    if seconds is None or not isinstance(seconds, (int, float)):
+        return [f"DELAY node {node_id} requires seconds number"]
+    return []
+
+
+def _validate_subworkflow(node_id: Any, config: Dict[str, Any]) -> List[str]:
+    errors = []
+    workflow_id = config.get("workflow_id")
+    if not isinstance(workflow_id, int) or isinstance(workflow_id, bool):
+        errors.append(f"SUBWORKFLOW node {node_id} requires workflow_id integer")
+    for field in ("inputs", "outputs"):
+        if config.get(field) is not None and not isinstance(config[field], dict):
+            errors.append(f"SUBWORKFLOW node {node_id} {field} must be an object")
+    return errors
+
+
+def _string_schema(*required: str, **properties: Dict[str, Any]) -> Dict[str, Any]:
+    schema_properties = {name: {"type": "string"} for name in required}
+    schema_properties.update(properties)
+    return {"type": "object", "required": list(required), "properties": schema_properties}
+
+
+node_types = NodeTypeRegistry()
+
+node_types.register(
+    NodeType(
+        "INPUT",
+        f"{EXECUTORS_PACKAGE}.core:execute_input",
+        config_schema={
+            "type": "object",
+            "properties": {"key": {"type": "string"}, "value": {}, "input_type": {"enum": ["text", "file", "image"]}},
+        },
+        hint='INPUT config should be {} or {"key": "text", "input_type": "text|file|image"}.',
+    )
+)
+node_types.register(
+    NodeType(
+        "TRANSFORM",
+        f"{EXECUTORS_PACKAGE}.core:execute_transform",
+        config_schema=_string_schema("template"),
+        validator=_validate_string_field("TRANSFORM", "template"),
+        hint='TRANSFORM config requires {"template": string} and may use {{variable}} placeholders.',
+    )
+)
+node_types.register(
+    NodeType(
+        "HTTP",
+        f"{EXECUTORS_PACKAGE}.http:execute_http",
+        config_schema=_string_schema(
+            "url",
+            method={"enum": ["GET", "POST", "PUT", "DELETE", "PATCH"]},
+            body={},
+            select={"type": "string"},
+            response_format={"enum": ["auto", "json", "ndjson", "text"]},
+            max_bytes={"type": "integer", "minimum": 0},
+        ),
+        validator=_validate_http,
+        hint='HTTP config requires {"url": https://...}.',
+    )
+)
+node_types.register(
+    NodeType(
+        "LLM",
+        f"{EXECUTORS_PACKAGE}.llm:execute_llm",
+        config_schema=_string_schema(
+            "prompt",
+            image_key={"type": "string"},
+            stream={"type": "boolean"},
+            max_output_bytes={"type": "integer"},
+        ),
+        validator=_validate_string_field("LLM", "prompt"),
+        hint=(
+            'LLM config requires {"prompt": string} and may use {{variable}} placeholders. '
+            'Optional {"image_key": "image"} for image tasks.'
+        ),
+    )
+)
+node_types.register(
+    NodeType(
+        "OUTPUT",
+        f"{EXECUTORS_PACKAGE}.core:execute_output",
+        config_schema={"type": "object", "properties": {"select": {"type": "array"}}},
+        validator=_optional_list("OUTPUT", "select"),
+        hint='OUTPUT config requires {"select": [node_ids]} or {} to return all outputs.',
+    )
+)
+node_types.register(
+    NodeType(
+        "CONDITION",
+        f"{EXECUTORS_PACKAGE}.core:execute_condition",
+        config_schema={
+            "type": "object",
+            "required": ["left", "operator", "right"],
+            "properties": {
+                "left": {},
+                "operator": {"enum": ["equals", "not_equals", "contains", "greater_than", "less_than"]},
+                "right": {},
+            },
+        },
+        validator=_validate_condition,
+        hint=(
+            'CONDITION config requires {"left": value, '
+            '"operator": "equals|not_equals|contains|greater_than|less_than", "right": value}.'
+        ),
+    )
+)
+node_types.register(
+    NodeType(
+        "MERGE",
+        f"{EXECUTORS_PACKAGE}.core:execute_merge",
+        config_schema={
+            "type": "object",
+            "properties": {"sources": {"type": "array"}, "key_by": {"enum": ["name", "id"]}},
+        },
+        validator=_optional_list("MERGE", "sources"),
+        hint='MERGE config uses {"sources": [node_ids], "key_by": "name|id"}.',
+    )
+)
+node_types.register(
+    NodeType(
+        "DELAY",
+        f"{EXECUTORS_PACKAGE}.core:execute_delay",
+        config_schema={"type": "object", "required": ["seconds"], "properties": {"seconds": {"type": "number"}}},
+        validator=_validate_delay,
+        hint='DELAY config uses {"seconds": number}.',
+    )
+)
+node_types.register(
+    NodeType(
+        "SUBWORKFLOW",
+        f"{EXECUTORS_PACKAGE}.subworkflow:execute_subworkflow",
+        config_schema={
+            "type": "object",
+            "required": ["workflow_id"],
+            "properties": {
+                "workflow_id": {"type": "integer"},
+                "inputs": {"type": "object"},
+                "outputs": {"type": "object"},
+            },
+        },
+        validator=_validate_subworkflow,
+        # A model cannot know which stored workflow ids exist.
+        generatable=False,
+    )
+)
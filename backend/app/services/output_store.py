@@ -0,0 +1,108 @@
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Iterator, MutableMapping, Optional
+
+
+def estimate_size(value: Any, limit: int) -> int:
+    """Rough in-memory size of a JSON-like value; stops counting once past ``limit``."""
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (str, bytes, bytearray)):
+            total += len(item)
+        elif isinstance(item, dict):
+            total += 16 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            total += 8 * len(item)
+            stack.extend(item)
+        else:
+            total += 16
+        if total > limit:
+            break
+    return total
+
+
+class _Spilled:
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+
+
+class OutputStore(MutableMapping):
+    """Node outputs for one run; values above ``spill_bytes`` live in temp files.
+
+    Spilled values are reloaded from disk on every access instead of being
+    cached, so a run holds at most the outputs that are small or in use.
+    A ``spill_bytes`` of 0 keeps everything in memory.
+    """
+
+    def __init__(self, spill_bytes: int = 0, spill_dir: Optional[str] = None) -> None:
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir or None
+        self._values: Dict[int, Any] = {}
+
+    def __getitem__(self, node_id: int) -> Any:
+        value = self._values[node_id]
+        if isinstance(value, _Spilled):
+            with open(value.path, "rb") as handle:
+                return pickle.load(handle)
+        return value
+
+    def __setitem__(self, node_id: int, value: Any) -> None:
+        self._discard(node_id)
+        if self.spill_bytes > 0:
+            size = estimate_size(value, self.spill_bytes)
+            if size > self.spill_bytes:
+                spilled = self._spill(value, size)
+                if spilled is not None:
+                    self._values[node_id] = spilled
+                    return
+        self._values[node_id] = value
+
+    def __delitem__(self, node_id: int) -> None:
+        if node_id not in self._values:
+            raise KeyError(node_id)
+        self._discard(node_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._values
+
+    def is_spilled(self, node_id: int) -> bool:
+        return isinstance(self._values.get(node_id), _Spilled)
+
+    def _spill(self, value: Any, size: int) -> Optional[_Spilled]:
+        handle = tempfile.NamedTemporaryFile(prefix="agentflow-output-", dir=self.spill_dir, delete=False)
+        try:
+            with handle:
+                pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            os.unlink(handle.name)
+            return None
+        return _Spilled(handle.name, size)
+
+    def _discard(self, node_id: int) -> None:
+        value = self._values.pop(node_id, None)
+        if isinstance(value, _Spilled):
+            try:
+                os.unlink(value.path)
+            except FileNotFoundError:
+                pass
+
+    def snapshot(self) -> Dict[int, Any]:
+        return {node_id: self[node_id] for node_id in self._values}
+
+    def close(self) -> None:
+        for node_id in list(self._values):
+            self._discard(node_id)
@@ -0,0 +1,115 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from app.config import settings
+
+
+class TokenBucket:
+    """Blocking token bucket; callers queue for tokens instead of failing."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        # Reserve the tokens up front (the balance may go negative) so waiters
+        # are served in arrival order, then sleep outside the lock.
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Per-key token bucket plus concurrency cap (keys are hosts or models).
+
+    A rate of 0 disables rate limiting and a max_concurrency of 0 disables the
+    concurrency cap.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = 0.0,
+        burst: float = 1.0,
+        max_concurrency: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_second > 0 or self.max_concurrency > 0
+
+    def _bucket(self, key: str) -> Optional[TokenBucket]:
+        if self.rate_per_second <= 0:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_second, self.burst, self._clock, self._sleep)
+                self._buckets[key] = bucket
+            return bucket
+
+    def _semaphore(self, key: str) -> Optional[threading.BoundedSemaphore]:
+        if self.max_concurrency <= 0:
+            return None
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_concurrency)
+                self._semaphores[key] = semaphore
+            return semaphore
+
+    @contextmanager
+    def limit(self, key: str) -> Iterator[None]:
+        semaphore = self._semaphore(key)
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            bucket = self._bucket(key)
+            if bucket is not None:
+                bucket.acquire()
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+
+http_limiter = RateLimiter(
+    rate_per_second=settings.http_rate_limit_per_second,
+    burst=settings.http_rate_limit_burst,
+    max_concurrency=settings.http_max_concurrency_per_host,
+)
+llm_limiter = RateLimiter(
+    rate_per_second=settings.llm_rate_limit_per_minute / 60.0,
+    burst=settings.llm_rate_limit_burst,
+    max_concurrency=settings.llm_max_concurrency_per_model,
+)
@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+
+class RunCancelled(Exception):
+    """Raised inside a run once it has been cancelled or its deadline has passed."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class RunControl:
+    """Cancellation flag and deadline for one executing run.
+
+    The engine calls ``check()`` between nodes and executors wait through
+    ``wait()`` so a cancel or an expired deadline interrupts them at once.
+    ``poll`` is an optional callable (for example a database lookup) that
+    returns a truthy value once cancellation was requested elsewhere; it
+    runs at most every ``poll_interval`` seconds from ``check()``.
+    """
+
+    __slots__ = ("run_id", "deadline", "reason", "_event", "_poll", "_poll_interval", "_next_poll")
+
+    def __init__(
+        self,
+        run_id: Optional[int] = None,
+        deadline_at: Optional[datetime] = None,
+        poll: Optional[Callable[[], bool]] = None,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.run_id = run_id
+        self.deadline: Optional[float] = None
+        if deadline_at is not None:
+            self.deadline = time.monotonic() + (deadline_at - datetime.utcnow()).total_seconds()
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._poll = poll
+        self._poll_interval = poll_interval
+        self._next_poll = time.monotonic() + poll_interval
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Run cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def timeout(self, default: float) -> float:
+        """Cap a per-call timeout so it never outlives the run deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(min(default, remaining), 0.001)
+
+    def check(self) -> None:
+        if not self._event.is_set() and self._poll is not None and time.monotonic() >= self._next_poll:
+            self._next_poll = time.monotonic() + self._poll_interval
+            if self._poll():
+                self.cancel()
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("Run deadline exceeded")
+        if self._event.is_set():
+            raise RunCancelled(self.reason or "Run cancelled")
+
+    def wait(self, seconds: float) -> None:
+        """Sleep for ``seconds`` unless the run is cancelled or hits its deadline first."""
+        remaining = self.remaining()
+        timeout = seconds if remaining is None else min(seconds, remaining)
+        self._event.wait(timeout)
+        self.check()
+
+
+class RunControlRegistry:
+    """Controls of the runs executing in this process, so cancels reach them directly."""
+
+    def __init__(self) -> None:
+        self._controls: Dict[int, RunControl] = {}
+        self._lock = threading.Lock()
+
+    def register(self, control: RunControl) -> None:
+        with self._lock:
+            self._controls[control.run_id] = control
+
+    def unregister(self, control: RunControl) -> None:
+        with self._lock:
+            if self._controls.get(control.run_id) is control:
+                del self._controls[control.run_id]
+
+    def __contains__(self, run_id: object) -> bool:
+        with self._lock:
+            return run_id in self._controls
+
+    def cancel(self, run_id: int, reason: str = "Run cancelled") -> bool:
+        with self._lock:
+            control = self._controls.get(run_id)
+        if control is None:
+            return False
+        control.cancel(reason)
+        return True
+
+
+run_controls = RunControlRegistry()
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+FINISHED_CHANNELS_KEPT = 256
+
+
+class _Channel:
+    def __init__(self, history: int) -> None:
+        self.events: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=history)
+        self.next_seq = 0
+        self.closed = False
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+
+class RunEventBus:
+    """In-process progress channel per run.
+
+    Events are kept in a bounded per-run buffer so late subscribers replay
+    what they missed. Channels of finished runs are kept for a while and then
+    dropped.
+    """
+
+    def __init__(self, history: int = 1000) -> None:
+        self.history = history
+        self._lock = threading.Lock()
+        self._channels: Dict[int, _Channel] = {}
+        self._finished: "OrderedDict[int, None]" = OrderedDict()
+
+    def _channel(self, run_id: int) -> _Channel:
+        with self._lock:
+            channel = self._channels.get(run_id)
+            if channel is None:
+                channel = _Channel(self.history)
+                self._channels[run_id] = channel
+            return channel
+
+    def has_channel(self, run_id: int) -> bool:
+        with self._lock:
+            return run_id in self._channels
+
+    def publish(self, run_id: int, event: Dict[str, Any]) -> None:
+        channel = self._channel(run_id)
+        with channel.cond:
+            channel.events.append((channel.next_seq, event))
+            channel.next_seq += 1
+            channel.cond.notify_all()
+
+    def finish(self, run_id: int, status: str) -> None:
+        channel = self._channel(run_id)
+        with channel.cond:
+            channel.events.append((channel.next_seq, {"type": "run", "status": status}))
+            channel.next_seq += 1
+            channel.closed = True
+            channel.cond.notify_all()
+        with self._lock:
+            self._finished[run_id] = None
+            while len(self._finished) > FINISHED_CHANNELS_KEPT:
+                expired, _ = self._finished.popitem(last=False)
+                self._channels.pop(expired, None)
+
+    def wait_closed(self, run_id: int, timeout: float) -> bool:
+        """Block until the run's channel closes or ``timeout`` passes; False if it has no channel here."""
+        with self._lock:
+            channel = self._channels.get(run_id)
+        if channel is None:
+            return False
+        with channel.cond:
+            return channel.cond.wait_for(lambda: channel.closed, timeout)
+
+    def subscribe(self, run_id: int, idle_timeout: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Yield events for a run until it finishes; yields None after each idle timeout."""
+        channel = self._channel(run_id)
+        with channel.cond:
+            channel.subscribers += 1
+        seq = 0
+        try:
+            while True:
+                with channel.cond:
+                    pending = [event for event_seq, event in channel.events if event_seq >= seq]
+                    if not pending and not channel.closed:
+                        channel.cond.wait(idle_timeout)
+                        pending = [event for event_seq, event in channel.events if event_seq >= seq]
+                    seq = channel.next_seq
+                    closed = channel.closed
+                if not pending and not closed:
+                    yield None
+                for event in pending:
+                    yield event
+                if closed:
+                    return
+        finally:
+            self._unsubscribe(run_id, channel)
+
+    def _unsubscribe(self, run_id: int, channel: _Channel) -> None:
+        # A channel nothing ever published to was created by the subscriber
+        # alone; drop it once its last subscriber leaves.
+        with self._lock, channel.cond:
+            channel.subscribers -= 1
+            if not channel.subscribers and not channel.next_seq and self._channels.get(run_id) is channel:
+                del self._channels[run_id]
+
+
+run_events = RunEventBus()
@@ -0,0 +1,78 @@
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Run, StepLog
+from app.services.run_control import RunCancelled, RunControl, run_controls
+from app.services.run_events import run_events
+from app.services.runtime import RuntimePlan
+from app.services.workflow_engine import execute_plan
+
+FINISHED_STATUSES = {"SUCCESS", "FAILED", "CANCELLED"}
+
+
+def executor_id(role: str) -> str:
+    return f"{role}-{socket.gethostname()}-{os.getpid()}"
+
+
+def _finish(db: Session, run: Run, status: str, message: Optional[str] = None, owner: Optional[str] = None) -> Run:
+    """Record the final status, unless another executor has taken the run over from ``owner``.
+
+    A worker whose lease expired must not overwrite the outcome written by
+    the worker that reclaimed the run, so the update is filtered on it.
+    """
+    query = db.query(Run).filter(Run.id == run.id)
+    if owner is not None:
+        query = query.filter(Run.worker_id == owner)
+    updated = query.update(
+        {"status": status, "finished_at": datetime.utcnow(), "lease_expires_at": None},
+        synchronize_session=False,
+    )
+    if not updated:
+        db.rollback()
+        return run
+    if message:
+        db.add(StepLog(run_id=run.id, node_id=None, status=status, message=message, timestamp=datetime.utcnow()))
+    db.commit()
+    run_events.finish(run.id, status)
+    return run
+
+
+def cancel_requested(db: Session, run_id: int) -> bool:
+    return db.query(Run.cancel_requested_at).filter(Run.id == run_id).scalar() is not None
+
+
+def execute_run(db: Session, run: Run, plan: RuntimePlan, run_input: Dict[str, Any]) -> Run:
+    run_id = run.id
+    owner = run.worker_id
+    if plan.errors:
+        return _finish(db, run, "FAILED", "Validation failed: " + "; ".join(plan.errors), owner)
+
+    control = RunControl(
+        run_id,
+        run.deadline_at,
+        poll=lambda: cancel_requested(db, run_id),
+        poll_interval=settings.run_cancel_poll_seconds,
+    )
+    if run.cancel_requested_at is not None:
+        return _finish(db, run, "CANCELLED", "Run cancelled before it started", owner)
+    if control.remaining() == 0:
+        return _finish(db, run, "CANCELLED", "Run deadline exceeded before it started", owner)
+
+    run.status = "RUNNING"
+    db.commit()
+
+    run_controls.register(control)
+    try:
+        execute_plan(db, plan, run_id, run_input, control)
+    except RunCancelled as exc:
+        return _finish(db, run, "CANCELLED", exc.reason, owner)
+    except Exception:
+        return _finish(db, run, "FAILED", owner=owner)
+    finally:
+        run_controls.unregister(control)
+    return _finish(db, run, "SUCCESS", owner=owner)
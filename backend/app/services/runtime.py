@@ -0,0 +1,259 @@
+"""Immutable runtime representation of a workflow, detached from the ORM.
+
+A ``RuntimePlan`` is built once per workflow version from plain column rows
+and holds everything the engine needs: nodes keyed by id, the edge list, the
+execution order, validation errors and the output release plan. Plans never
+touch a session, so they can be shared between threads, pickled to worker
+processes and cached across runs until the workflow version changes.
+
+Attributes cannot be reassigned and every mapping on a plan is a read-only
+view. A node's ``config`` is a private copy behind a read-only view; values
+nested inside it stay plain JSON types so executors can use them as-is, and
+must be copied rather than mutated. Cache
+entries are keyed on the version and the workflow's creation time, so a
+deleted workflow's plan is never served for a new one that reuses its id.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Edge, Node, Workflow
+from app.services.dag import analyze_dag
+from app.services.templates import template_fields
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _init(self, **values: Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        # Read-only views cannot be pickled; the constructor wraps them again.
+        values = (getattr(self, name) for name in self.__slots__)
+        return (type(self), tuple(dict(value) if isinstance(value, MappingProxyType) else value for value in values))
+
+
+class RuntimeNode(_Frozen):
+    """One workflow node; ``type`` is upper-cased and ``config`` is never None."""
+
+    __slots__ = ("id", "type", "name", "config")
+
+    def __init__(self, id: int, type: str, name: str, config: Optional[Mapping[str, Any]]) -> None:
+        self._init(id=id, type=type.upper(), name=name, config=MappingProxyType(copy.deepcopy(dict(config or {}))))
+
+    def __repr__(self) -> str:
+        return f"RuntimeNode(id={self.id!r}, type={self.type!r}, name={self.name!r})"
+
+
+class RuntimePlan(_Frozen):
+    """Read-only execution plan for one version of a workflow."""
+
+    __slots__ = ("workflow_id", "version", "nodes", "edges", "order", "errors", "release", "name_to_id")
+
+    def __init__(
+        self,
+        workflow_id: Optional[int],
+        version: int,
+        nodes: Mapping[int, RuntimeNode],
+        edges: Tuple[Tuple[int, int], ...],
+        order: Tuple[int, ...],
+        errors: Tuple[str, ...],
+        release: Mapping[int, Tuple[int, ...]],
+        name_to_id: Mapping[str, int],
+    ) -> None:
+        self._init(
+            workflow_id=workflow_id,
+            version=version,
+            nodes=MappingProxyType(dict(nodes)),
+            edges=tuple(edges),
+            order=tuple(order),
+            errors=tuple(errors),
+            release=MappingProxyType(dict(release)),
+            name_to_id=MappingProxyType(dict(name_to_id)),
+        )
+
+    def __repr__(self) -> str:
+        return f"RuntimePlan(workflow_id={self.workflow_id!r}, version={self.version!r}, nodes={len(self.nodes)})"
+
+
+def _referenced_keys(value: Any, keys: Set[str]) -> bool:
+    """Collect context keys a config value may read; False if it cannot be determined."""
+    if isinstance(value, Mapping):
+        return all(_referenced_keys(item, keys) for item in value.values())
+    if isinstance(value, list):
+        return all(_referenced_keys(item, keys) for item in value)
+    if isinstance(value, bool) or value is None:
+        return True
+    if isinstance(value, (int, float)):
+        keys.add(str(value))
+        return True
+    text = str(value)
+    keys.add(text)
+    if "{" in text:
+        fields = template_fields(text)
+        if fields is None:
+            return False
+        keys.update(fields)
+    return True
+
+
+def _reads_all_outputs(node: RuntimeNode) -> bool:
+    if node.type == "LLM":
+        # The whole context is sent to the provider.
+        return True
+    if node.type == "OUTPUT":
+        return not node.config.get("select")
+    if node.type == "MERGE":
+        return not node.config.get("sources")
+    return False
+
+
+def plan_output_release(
+    order: Sequence[int],
+    nodes: Mapping[int, RuntimeNode],
+    edges: Iterable[Tuple[int, int]],
+) -> Dict[int, Tuple[int, ...]]:
+    """Map each node id to the outputs that can be dropped once it has run.
+
+    An output stays live until its last consumer: a direct successor, a node
+    whose config mentions its id or name, or a node reading every output.
+    Outputs without consumers are the run's results and are never released.
+    """
+    position = {node_id: index for index, node_id in enumerate(order)}
+    last_use: Dict[int, int] = {}
+
+    def use(node_id: int, index: int) -> None:
+        if node_id in position and index > position[node_id]:
+            last_use[node_id] = max(last_use.get(node_id, -1), index)
+
+    for source, target in edges:
+        if target in position:
+            use(source, position[target])
+
+    key_to_ids: Dict[str, List[int]] = {}
+    for node_id in order:
+        key_to_ids.setdefault(str(node_id), []).append(node_id)
+        key_to_ids.setdefault(nodes[node_id].name, []).append(node_id)
+
+    last_read_all = -1
+    for index, node_id in enumerate(order):
+        node = nodes[node_id]
+        keys: Set[str] = set()
+        if _reads_all_outputs(node) or not _referenced_keys(node.config, keys):
+            last_read_all = index
+            continue
+        for key in keys:
+            for referenced in key_to_ids.get(key, ()):
+                use(referenced, index)
+
+    for node_id in order:
+        use(node_id, last_read_all)
+
+    release: Dict[int, List[int]] = {}
+    for node_id, index in last_use.items():
+        release.setdefault(order[index], []).append(node_id)
+    return {node_id: tuple(released) for node_id, released in release.items()}
+
+
+def build_plan(workflow_id: Optional[int], version: int, nodes: Sequence, edges: Sequence) -> RuntimePlan:
+    """Build a plan from node and edge rows (ORM instances or column tuples)."""
+    analysis = analyze_dag(nodes, edges)
+    errors = tuple(analysis.errors)
+    runtime_nodes = {node.id: RuntimeNode(node.id, node.type, node.name, node.config) for node in nodes}
+    runtime_edges = tuple((edge.from_node_id, edge.to_node_id) for edge in edges)
+    order = tuple(analysis.order) if not errors else ()
+    release = plan_output_release(order, runtime_nodes, runtime_edges) if not errors else {}
+    name_to_id = {node.name: node.id for node in runtime_nodes.values()}
+    return RuntimePlan(workflow_id, version, runtime_nodes, runtime_edges, order, errors, release, name_to_id)
+
+
+def plan_from_workflow(workflow: Workflow) -> RuntimePlan:
+    return build_plan(workflow.id, workflow.version or 0, workflow.nodes, workflow.edges)
+
+
+class PlanCache:
+    """Small LRU of plans keyed by workflow id, valid for one workflow revision.
+
+    A revision is any hashable value identifying the workflow's current graph;
+    ``load_plan`` uses ``(version, created_at)``.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._plans: "OrderedDict[int, Tuple[Any, RuntimePlan]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, workflow_id: int, revision: Any) -> Optional[RuntimePlan]:
+        with self._lock:
+            entry = self._plans.get(workflow_id)
+            if entry is None or entry[0] != revision:
+                return None
+            self._plans.move_to_end(workflow_id)
+            return entry[1]
+
+    def put(self, plan: RuntimePlan, revision: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._plans[plan.workflow_id] = (revision, plan)
+            self._plans.move_to_end(plan.workflow_id)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def discard(self, workflow_id: int) -> None:
+        with self._lock:
+            self._plans.pop(workflow_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+
+plan_cache = PlanCache(settings.plan_cache_size)
+
+
+def load_plan(db: Session, workflow_id: int) -> Optional[RuntimePlan]:
+    """Return the current plan for a workflow, or None if it does not exist.
+
+    Only the version and creation time are read when the cached plan is still
+    current; otherwise nodes and edges are loaded as column tuples, never as
+    ORM objects.
+    """
+    row = db.query(Workflow.version, Workflow.created_at).filter(Workflow.id == workflow_id).first()
+    if row is None:
+        plan_cache.discard(workflow_id)
+        return None
+    version, created_at = row
+    revision = (version, created_at)
+    plan = plan_cache.get(workflow_id, revision)
+    if plan is not None:
+        return plan
+    nodes = (
+        db.query(Node.id, Node.type, Node.name, Node.config)
+        .filter(Node.workflow_id == workflow_id)
+        .order_by(Node.id)
+        .all()
+    )
+    edges = (
+        db.query(Edge.from_node_id, Edge.to_node_id)
+        .filter(Edge.workflow_id == workflow_id)
+        .order_by(Edge.id)
+        .all()
+    )
+    plan = build_plan(workflow_id, version, nodes, edges)
+    plan_cache.put(plan, revision)
+    return plan
@@ -0,0 +1,97 @@
+"""Choose which queued run a worker takes next.
+
+Queued runs are grouped by ``(workflow_id, priority)``. Each group is
+scored by the runs its workflow already has executing divided by the
+weight of the group's priority class. The worker claims from the
+lowest-scoring group first. A workflow therefore gets worker slots in
+proportion to its weight, whatever the size of its backlog.
+Interactive runs outrank batch and background runs without starving
+them. Workflows at their concurrency cap are skipped.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models import Run, Workflow
+
+PRIORITIES = ("interactive", "batch", "background")
+DEFAULT_PRIORITY = "interactive"
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse ``"interactive=8,batch=2,background=1"``; unknown or missing classes get weight 1."""
+    weights = {priority: 1.0 for priority in PRIORITIES}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip().lower()
+        if name in weights and weight.strip():
+            weights[name] = max(float(weight), 0.001)
+    return weights
+
+
+class QueueGroup:
+    __slots__ = ("workflow_id", "priority", "oldest", "queued")
+
+    def __init__(self, workflow_id: int, priority: str, oldest: Optional[datetime], queued: int) -> None:
+        self.workflow_id = workflow_id
+        self.priority = priority
+        self.oldest = oldest
+        self.queued = queued
+
+
+def fair_order(
+    groups: Sequence[QueueGroup],
+    running: Dict[int, int],
+    caps: Dict[int, int],
+    weights: Dict[str, float],
+) -> List[QueueGroup]:
+    """Order queue groups by weighted attained service, skipping capped workflows."""
+    ordered: List[Tuple[float, float, datetime, QueueGroup]] = []
+    for group in groups:
+        active = running.get(group.workflow_id, 0)
+        cap = caps.get(group.workflow_id, 0)
+        if cap and active >= cap:
+            continue
+        weight = weights.get(group.priority, 1.0)
+        ordered.append((active / weight, -weight, group.oldest or datetime.min, group))
+    ordered.sort(key=lambda item: item[:3])
+    return [item[3] for item in ordered]
+
+
+def load_queue(db: Session) -> Tuple[List[QueueGroup], Dict[int, int], Dict[int, int]]:
+    """Queued groups, executing runs per workflow and effective concurrency caps."""
+    rows = (
+        db.query(Run.workflow_id, Run.priority, func.min(Run.queued_at), func.count(Run.id))
+        .filter(Run.status == "PENDING", Run.worker_id.is_(None))
+        .group_by(Run.workflow_id, Run.priority)
+        .all()
+    )
+    groups = [
+        QueueGroup(workflow_id, priority or DEFAULT_PRIORITY, oldest, queued)
+        for workflow_id, priority, oldest, queued in rows
+    ]
+    if not groups:
+        return [], {}, {}
+    workflow_ids = {group.workflow_id for group in groups}
+    running = dict(
+        db.query(Run.workflow_id, func.count(Run.id))
+        .filter(Run.status == "RUNNING", Run.workflow_id.in_(workflow_ids))
+        .group_by(Run.workflow_id)
+        .all()
+    )
+    caps = {workflow_id: settings.workflow_max_concurrency for workflow_id in workflow_ids}
+    for workflow_id, cap in db.query(Workflow.id, Workflow.max_concurrency).filter(Workflow.id.in_(workflow_ids)):
+        if cap is not None:
+            caps[workflow_id] = cap
+    return groups, running, caps
+
+
+def queue_plan(db: Session) -> List[Tuple[QueueGroup, int]]:
+    """Groups to claim from, best first, each with its workflow's concurrency cap (0 = none)."""
+    groups, running, caps = load_queue(db)
+    weights = parse_weights(settings.run_priority_weights)
+    return [(group, caps.get(group.workflow_id, 0)) for group in fair_order(groups, running, caps, weights)]
@@ -0,0 +1,58 @@
+"""JSON encoding used across the engine and heavy API responses.
+
+orjson is used when it is installed; otherwise the stdlib encoder is
+configured to produce the same compact, UTF-8 output so rendered templates
+and step messages do not depend on which backend is present.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default)
+_sorted_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default, sort_keys=True)
+
+
+def dumps_bytes(value: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON; raises TypeError for unsupported values."""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        try:
+            return orjson.dumps(value, option=options)
+        except TypeError:
+            # orjson rejects some values stdlib accepts (e.g. ints over 64 bits).
+            pass
+    encoder = _sorted_encoder if sort_keys else _encoder
+    return encoder.encode(value).encode("utf-8")
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    return dumps_bytes(value, sort_keys=sort_keys).decode("utf-8")
+
+
+def iterencode(value: Any):
+    """Incremental compact encoding, matching dumps() for JSON-native values."""
+    return _encoder.iterencode(value)
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -0,0 +1,69 @@
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.services.run_control import RunControl
+
+# How often a waiting caller checks its own run for a cancel or deadline.
+FOLLOWER_POLL_SECONDS = 0.05
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight wait for its result (or exception) and each get their own deep
+    copy. A waiting caller's ``control`` is checked while it waits, so its
+    run can still be cancelled or time out; the leader's call carries on.
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], control: Optional[RunControl] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            while not call.event.wait(None if control is None else FOLLOWER_POLL_SECONDS):
+                control.check()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+http_flight = SingleFlight()
+llm_flight = SingleFlight()
@@ -0,0 +1,70 @@
+import re
+import string
+from typing import Any, Iterator, Mapping, Optional, Set
+
+from app.services.serialization import dumps
+
+
+class TemplateFormatter(string.Formatter):
+    def get_value(self, key, args, kwargs):
+        if isinstance(key, int):
+            key = str(key)
+        if isinstance(key, str) and key not in kwargs:
+            raise KeyError(key)
+        return super().get_value(key, args, kwargs)
+
+
+def stringify(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    try:
+        return dumps(value)
+    except TypeError:
+        return str(value)
+
+
+def normalize_template(template: str) -> str:
+    return re.sub(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}", r"{\1}", template)
+
+
+def template_fields(template: str) -> Optional[Set[str]]:
+    """Top-level context keys a template reads, or None if it cannot be parsed."""
+    try:
+        parsed = list(string.Formatter().parse(normalize_template(template)))
+    except ValueError:
+        return None
+    fields = set()
+    for _literal, field_name, _spec, _conversion in parsed:
+        if field_name:
+            fields.add(re.split(r"[.\[]", field_name, maxsplit=1)[0])
+    return fields
+
+
+class _StringContext(Mapping):
+    """Stringifies context values on lookup so unused values are never serialized."""
+
+    def __init__(self, context: Mapping) -> None:
+        self._context = context
+
+    def __getitem__(self, key: str) -> str:
+        return stringify(self._context[key])
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._context
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._context)
+
+    def __len__(self) -> int:
+        return len(self._context)
+
+
+def format_template(template: str, context: Mapping) -> str:
+    formatter = TemplateFormatter()
+    string_context = _StringContext(context)
+    try:
+        normalized = normalize_template(template)
+        return formatter.vformat(normalized, args=(), kwargs=string_context)
+    except KeyError as exc:
+        missing = exc.args[0]
+        raise ValueError(f"Missing template variable: {missing}") from exc
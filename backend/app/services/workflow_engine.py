@@ -1,109 +1,89 @@
-import json
-import re
-import string
-import time
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
 
-import httpx
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.db.models import StepLog
-from app.services.dag import topological_sort
+from app.services.node_types import node_types
+from app.services.output_store import OutputStore, estimate_size
+from app.services.run_control import RunCancelled, RunControl
+from app.services.run_events import run_events
+from app.services.runtime import RuntimeNode, RuntimePlan, plan_from_workflow
+from app.services.serialization import iterencode
+from app.services.templates import format_template, stringify
 
 
-class LLMProvider:
-    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
-        raise NotImplementedError
+SUMMARY_FAST_PATH_BYTES = 64 * 1024
 
 
-class DummyLLMProvider(LLMProvider):
-    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
-        return {"prompt": prompt, "context": context, "provider": "dummy"}
+def summarize_output(output: Any, max_len: int = 200) -> str:
+    if isinstance(output, str):
+        text = output
+    elif estimate_size(output, SUMMARY_FAST_PATH_BYTES) <= SUMMARY_FAST_PATH_BYTES:
+        text = stringify(output)
+    else:
+        # Encode incrementally and stop once past max_len instead of
+        # serializing large outputs in full.
+        pieces = []
+        length = 0
+        try:
+            for piece in iterencode(output):
+                pieces.append(piece)
+                length += len(piece)
+                if length > max_len:
+                    break
+            text = "".join(pieces)
+        except (TypeError, ValueError):
+            text = str(output)
+    if len(text) > max_len:
+        return f"{text[:max_len]}...(truncated)"
+    return text
 
-class GeminiLLMProvider(LLMProvider):
-    def __init__(self, api_key: str, model: str) -> None:
-        self.api_key = api_key
-        self.model = model
 
-    def generate(self, prompt: str, context: Dict[str, Any], image: Optional[Dict[str, str]] = None) -> Any:
-        parts = [{"text": f"{prompt}\n\nContext:\n{json.dumps(context)}"}]
-        if image:
-            parts.append(
-                {
-                    "inlineData": {
-                        "mimeType": image["mime_type"],
-                        "data": image["data"],
-                    }
-                }
-            )
-        payload = {"contents": [{"role": "user", "parts": parts}]}
-        url = (
-            "https://generativelanguage.googleapis.com/v1beta/models/"
-            f"{self.model}:generateContent?key={self.api_key}"
-        )
-        response = httpx.post(url, json=payload, timeout=20.0)
-        response.raise_for_status()
-        data = response.json()
-        candidates = data.get("candidates") or []
-        if not candidates:
-            return {"provider": "gemini", "text": "", "raw": data}
-        content = candidates[0].get("content", {})
-        parts = content.get("parts") or []
-        text = parts[0].get("text", "") if parts else ""
-        return {"provider": "gemini", "text": text}
-
-
-class TemplateFormatter(string.Formatter):
-    def get_value(self, key, args, kwargs):
-        if isinstance(key, int):
-            key = str(key)
-        if isinstance(key, str) and key not in kwargs:
-            raise KeyError(key)
-        return super().get_value(key, args, kwargs)
-
-
-def _stringify(value: Any) -> str:
-    if isinstance(value, str):
-        return value
-    try:
-        return json.dumps(value)
-    except TypeError:
-        return str(value)
+class RunContext(Mapping):
+    """Template context over run input and node outputs, resolved lazily.
 
+    Lookup order matches a dict built from run input, ``run_input`` and then
+    each output under its node id and node name, later entries winning.
+    Output values are only loaded when a key is actually read.
+    """
 
-def _normalize_template(template: str) -> str:
-    return re.sub(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}", r"{\1}", template)
+    def __init__(self, node_lookup: Dict[int, Any], outputs: Mapping, run_input: Dict[str, Any]) -> None:
+        self._outputs = outputs
+        self._run_input = run_input
+        self._index: Dict[str, int] = {}
+        for node_id in outputs:
+            self._index[str(node_id)] = node_id
+            node = node_lookup.get(node_id)
+            if node is not None:
+                self._index[node.name] = node_id
 
+    def __getitem__(self, key: str) -> Any:
+        node_id = self._index.get(key)
+        if node_id is not None:
+            return self._outputs[node_id]
+        if key == "run_input":
+            return self._run_input
+        return self._run_input[key]
 
-def format_template(template: str, context: Dict[str, Any]) -> str:
-    formatter = TemplateFormatter()
-    string_context = {key: _stringify(value) for key, value in context.items()}
-    try:
-        normalized = _normalize_template(template)
-        return formatter.vformat(normalized, args=(), kwargs=string_context)
-    except KeyError as exc:
-        missing = exc.args[0]
-        raise ValueError(f"Missing template variable: {missing}") from exc
+    def __contains__(self, key: object) -> bool:
+        return key in self._index or key == "run_input" or key in self._run_input
 
+    def __iter__(self) -> Iterator[str]:
+        for key in self._run_input:
+            if key not in self._index:
+                yield key
+        if "run_input" not in self._index:
+            yield "run_input"
+        yield from self._index
 
-def summarize_output(output: Any, max_len: int = 200) -> str:
-    text = _stringify(output)
-    if len(text) > max_len:
-        return f"{text[:max_len]}...(truncated)"
-    return text
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
-def build_context(node_lookup: Dict[int, Any], outputs: Dict[int, Any], run_input: Dict[str, Any]) -> Dict[str, Any]:
-    context: Dict[str, Any] = dict(run_input)
-    context["run_input"] = run_input
-    for node_id, output in outputs.items():
-        node = node_lookup.get(node_id)
-        context[str(node_id)] = output
-        if node is not None:
-            context[node.name] = output
-    return context
+def build_context(node_lookup: Dict[int, Any], outputs: Mapping, run_input: Dict[str, Any]) -> RunContext:
+    return RunContext(node_lookup, outputs, run_input)
 
 
 def resolve_output_selection(selection: Any, name_to_id: Dict[str, int], outputs: Dict[int, Any]) -> Any:
@@ -120,27 +100,6 @@ def resolve_output_selection(selection: Any, name_to_id: Dict[str, int], outputs
     raise ValueError(f"Unsupported OUTPUT selection type: {selection}")
 
 
-def parse_image_payload(value: Any) -> Optional[Dict[str, str]]:
-    if not value:
-        return None
-    if isinstance(value, dict):
-        if "data_url" in value:
-            return parse_image_payload(value["data_url"])
-        if "dataUrl" in value:
-            return parse_image_payload(value["dataUrl"])
-        if "mime_type" in value and "data" in value:
-            return {"mime_type": value["mime_type"], "data": value["data"]}
-        if "mime_type" in value and "base64" in value:
-            return {"mime_type": value["mime_type"], "data": value["base64"]}
-    if isinstance(value, str):
-        if value.startswith("data:"):
-            match = re.match(r"data:([^;]+);base64,(.+)", value)
-            if match:
-                return {"mime_type": match.group(1), "data": match.group(2)}
-        return {"mime_type": "image/png", "data": value}
-    return None
-
-
 def resolve_value(value: Any, context: Dict[str, Any]) -> Any:
     if isinstance(value, str):
         if value in context:
@@ -168,156 +127,144 @@ def evaluate_condition(config: Dict[str, Any], context: Dict[str, Any]) -> bool:
     raise ValueError(f"Unsupported CONDITION operator: {operator}")
 
 
-def execute_node(node, outputs: Dict[int, Any], node_lookup: Dict[int, Any], run_input: Dict[str, Any], llm_provider: LLMProvider) -> Any:
-    node_type = node.type.upper()
-    config = node.config or {}
-
-    if node_type == "INPUT":
-        key = config.get("key")
-        has_value = "value" in config
-        if key:
-            if key in run_input:
-                return run_input[key]
-            if has_value:
-                run_input[key] = config.get("value")
-                return config.get("value")
-            raise ValueError(f"INPUT key '{key}' not found in run input")
-        if has_value:
-            return config.get("value")
-        return run_input
-
-    if node_type == "TRANSFORM":
-        template = config.get("template")
-        if not template:
-            raise ValueError("TRANSFORM node requires a template")
-        context = build_context(node_lookup, outputs, run_input)
-        return format_template(template, context)
-
-    if node_type == "HTTP":
-        url = config.get("url")
-        if not url:
-            raise ValueError("HTTP node requires a url")
-        method = (config.get("method") or "GET").upper()
-        if method not in {"GET", "POST", "PUT", "DELETE", "PATCH"}:
-            raise ValueError("HTTP method must be GET, POST, PUT, DELETE, or PATCH")
-        body = config.get("body")
-        json_body = None
-        data_body = None
-        if body is not None:
-            if isinstance(body, (dict, list)):
-                json_body = body
-            elif isinstance(body, str):
-                try:
-                    json_body = json.loads(body)
-                except json.JSONDecodeError:
-                    data_body = body
-        response = httpx.request(method, url, json=json_body, data=data_body, timeout=10.0)
-        response.raise_for_status()
-        return response.json()
-
-    if node_type == "LLM":
-        prompt = config.get("prompt")
-        if not prompt:
-            raise ValueError("LLM node requires a prompt")
-        context = build_context(node_lookup, outputs, run_input)
-        image_key = config.get("image_key")
-        if image_key and image_key in context:
-            context = {**context, image_key: "<image>"}
-        rendered = format_template(prompt, context)
-        image_payload = None
-        if image_key:
-            image_value = run_input.get(image_key)
-            if image_value is None:
-                image_value = context.get(image_key)
-            image_payload = parse_image_payload(image_value)
-            if not image_payload:
-                raise ValueError(f"Image key '{image_key}' not found or invalid")
-        return llm_provider.generate(rendered, context, image=image_payload)
-
-    if node_type == "OUTPUT":
-        select = config.get("select")
-        if not select:
-            return outputs
-        name_to_id = {node.name: node.id for node in node_lookup.values()}
-        aggregated: Dict[str, Any] = {}
-        for item in select:
-            if isinstance(item, int) or (isinstance(item, str) and item.isdigit()):
-                key = str(item)
-            else:
-                key = str(item)
-            aggregated[key] = resolve_output_selection(item, name_to_id, outputs)
-        return aggregated
-
-    if node_type == "MERGE":
-        sources = config.get("sources") or []
-        key_by = config.get("key_by", "name")
-        name_to_id = {node.name: node.id for node in node_lookup.values()}
-        aggregated: Dict[str, Any] = {}
-        if not sources:
-            sources = list(outputs.keys())
-        for item in sources:
-            output = resolve_output_selection(item, name_to_id, outputs)
-            key = str(item)
-            if key_by == "name" and (isinstance(item, int) or (isinstance(item, str) and item.isdigit())):
-                node = node_lookup.get(int(item))
-                if node:
-                    key = node.name
-            aggregated[key] = output
-        return aggregated
-
-    if node_type == "DELAY":
-        seconds = config.get("seconds", 1)
-        try:
-            delay = float(seconds)
-        except (TypeError, ValueError):
-            raise ValueError("DELAY seconds must be a number")
-        if delay < 0:
-            raise ValueError("DELAY seconds must be non-negative")
-        time.sleep(min(delay, 30))
-        return {"delayed_seconds": delay}
-
-    if node_type == "CONDITION":
-        context = build_context(node_lookup, outputs, run_input)
-        return evaluate_condition(config, context)
-
-    raise ValueError(f"Unsupported node type: {node.type}")
-
+class RunState:
+    """Mutable per-run state handed to node executors alongside the shared plan."""
+
+    __slots__ = ("plan", "outputs", "run_input", "emit", "control", "db", "run_id", "stack", "_llm_provider")
+
+    def __init__(
+        self,
+        plan: RuntimePlan,
+        outputs: Mapping,
+        run_input: Dict[str, Any],
+        llm_provider=None,
+        emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+        control: Optional[RunControl] = None,
+        db: Optional[Session] = None,
+        run_id: Optional[int] = None,
+        stack: Tuple[int, ...] = (),
+    ) -> None:
+        self.plan = plan
+        self.outputs = outputs
+        self.run_input = run_input
+        self.emit = emit
+        self.control = control or RunControl()
+        self.db = db
+        self.run_id = run_id
+        # Workflow ids from the run's own workflow down to this plan's caller.
+        self.stack = stack
+        self._llm_provider = llm_provider
+
+    @property
+    def llm_provider(self):
+        # Resolved on first use so runs without LLM nodes never load a provider.
+        if self._llm_provider is None:
+            from app.services.llm_providers import get_llm_provider
+
+            self._llm_provider = get_llm_provider()
+        return self._llm_provider
+
+    def context(self) -> RunContext:
+        return build_context(self.plan.nodes, self.outputs, self.run_input)
+
+    def child(self, plan: RuntimePlan, outputs: Mapping, run_input: Dict[str, Any]) -> "RunState":
+        """State for a sub-workflow executed inline as part of this run."""
+        return RunState(
+            plan,
+            outputs,
+            run_input,
+            llm_provider=self._llm_provider,
+            control=self.control,
+            db=self.db,
+            run_id=self.run_id,
+            stack=self.stack + (self.plan.workflow_id,),
+        )
 
-def execute_workflow(db: Session, workflow, run_id: int, run_input: Dict[str, Any]) -> Dict[int, Any]:
-    nodes = workflow.nodes
-    edges = workflow.edges
-    node_lookup = {node.id: node for node in nodes}
-    order = topological_sort(nodes, edges)
-    outputs: Dict[int, Any] = {}
-    if settings.gemini_api_key:
-        llm_provider = GeminiLLMProvider(settings.gemini_api_key, settings.gemini_model)
-    else:
-        llm_provider = DummyLLMProvider()
 
-    for node_id in order:
-        node = node_lookup[node_id]
-        try:
-            output = execute_node(node, outputs, node_lookup, run_input, llm_provider)
-            outputs[node_id] = output
-            log = StepLog(
-                run_id=run_id,
-                node_id=node_id,
-                status="SUCCESS",
-                message=summarize_output(output),
-                timestamp=datetime.utcnow(),
-            )
-            db.add(log)
-            db.commit()
-        except Exception as exc:
-            log = StepLog(
+def execute_node(node: RuntimeNode, state: RunState) -> Any:
+    node_type = node_types.get(node.type)
+    if node_type is None:
+        raise ValueError(f"Unsupported node type: {node.type}")
+    return node_type.execute(node, state)
+
+
+def execute_plan(
+    db: Session,
+    plan: RuntimePlan,
+    run_id: int,
+    run_input: Dict[str, Any],
+    control: Optional[RunControl] = None,
+) -> Dict[int, Any]:
+    """Run every node of a valid plan in order, logging one StepLog per node.
+
+    The session is only used to write step logs; node data comes from the
+    plan, so no ORM state is loaded or held while nodes execute. ``control``
+    is checked before each node and raises ``RunCancelled`` once the run is
+    cancelled or past its deadline.
+    """
+    outputs = OutputStore(settings.output_spill_bytes, settings.output_spill_dir)
+    state = RunState(plan, outputs, run_input, control=control, db=db, run_id=run_id)
+    try:
+        run_steps(state)
+        return outputs.snapshot()
+    finally:
+        outputs.close()
+
+
+def run_steps(state: RunState, keep: Tuple[int, ...] = ()) -> None:
+    """Execute ``state.plan`` node by node into ``state.outputs``.
+
+    Outputs in ``keep`` are never released, so callers can read them
+    afterwards even when no node of the plan consumes them.
+    """
+    plan = state.plan
+    release = plan.release if settings.output_release else {}
+    for node_id in plan.order:
+        state.control.check()
+        released = release.get(node_id, ())
+        if keep:
+            released = tuple(item for item in released if item not in keep)
+        _run_node(state.db, state.run_id, plan.nodes[node_id], state, released)
+
+
+def _run_node(db: Session, run_id: int, node: RuntimeNode, state: RunState, released: Tuple[int, ...]) -> None:
+    node_id = node.id
+    # Steps of sub-workflows are logged under the parent run, tagged with their workflow.
+    workflow_id = state.plan.workflow_id if state.stack else None
+    tag = {"node_id": node_id} if workflow_id is None else {"node_id": node_id, "workflow_id": workflow_id}
+
+    def emit(event: Dict[str, Any]) -> None:
+        run_events.publish(run_id, {**event, **tag})
+
+    def log(status: str, message: str) -> None:
+        db.add(
+            StepLog(
                 run_id=run_id,
+                workflow_id=workflow_id,
                 node_id=node_id,
-                status="FAILED",
-                message=str(exc),
+                status=status,
+                message=message,
                 timestamp=datetime.utcnow(),
             )
-            db.add(log)
-            db.commit()
-            raise
+        )
+        db.commit()
+        emit({"type": "step", "status": status, "message": message})
 
-    return outputs
+    state.emit = emit
+    outputs = state.outputs
+    try:
+        output = execute_node(node, state)
+        outputs[node_id] = output
+        message = summarize_output(output)
+        del output
+        for released_id in released:
+            outputs.pop(released_id, None)
+        log("SUCCESS", message)
+    except Exception as exc:
+        log("CANCELLED" if isinstance(exc, RunCancelled) else "FAILED", str(exc))
+        raise
+
+
+def execute_workflow(db: Session, workflow, run_id: int, run_input: Dict[str, Any]) -> Dict[int, Any]:
+    """Convenience wrapper for callers holding an ORM ``Workflow``."""
+    return execute_plan(db, plan_from_workflow(workflow), run_id, run_input)
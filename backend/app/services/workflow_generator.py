@@ -1,16 +1,21 @@
-import json
 import re
-from typing import Any, Dict, List
-
-import httpx
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
 
 from app.config import settings
 from app.services.dag import validate_dag
-
-ALLOWED_NODE_TYPES = {"INPUT", "TRANSFORM", "HTTP", "LLM", "OUTPUT", "CONDITION", "MERGE", "DELAY"}
+from app.services.node_types import node_types
+from app.services.rate_limit import llm_limiter
+from app.services.serialization import dumps, dumps_bytes, loads
+from app.services.single_flight import SingleFlight
 
 
 def build_generation_prompt(user_prompt: str) -> str:
+    generatable = [node_type for node_type in node_types if node_type.generatable]
+    type_names = "|".join(node_type.name for node_type in generatable)
+    type_rules = "".join(f"- {node_type.hint}\n" for node_type in generatable if node_type.hint)
     return (
         "You are an assistant that creates workflow JSON for AgentFlow Lite.\n"
         "Return ONLY valid JSON (no markdown, no extra text).\n\n"
@@ -19,7 +24,7 @@ def build_generation_prompt(user_prompt: str) -> str:
         "  \"name\": string,\n"
         "  \"description\": string | null,\n"
         "  \"nodes\": [\n"
-        "    {\"id\": int, \"type\": \"INPUT|TRANSFORM|HTTP|LLM|OUTPUT|CONDITION|MERGE|DELAY\", \"name\": string, \"config\": object}\n"
+        f"    {{\"id\": int, \"type\": \"{type_names}\", \"name\": string, \"config\": object}}\n"
         "  ],\n"
         "  \"edges\": [\n"
         "    {\"from_node_id\": int, \"to_node_id\": int}\n"
@@ -27,17 +32,7 @@ def build_generation_prompt(user_prompt: str) -> str:
         "}\n\n"
         "Rules:\n"
         "- Use only the node types listed above.\n"
-        "- INPUT config should be {} or {\"key\": \"text\", \"input_type\": \"text|file|image\"}.\n"
-        "- TRANSFORM config requires {\"template\": "
-        "string} and may use {{variable}} placeholders.\n"
-        "- HTTP config requires {\"url\": "
-        "https://...}.\n"
-        "- LLM config requires {\"prompt\": "
-        "string} and may use {{variable}} placeholders. Optional {\"image_key\": \"image\"} for image tasks.\n"
-        "- OUTPUT config requires {\"select\": [node_ids]} or {} to return all outputs.\n"
-        "- CONDITION config requires {\"left\": value, \"operator\": \"equals|not_equals|contains|greater_than|less_than\", \"right\": value}.\n"
-        "- MERGE config uses {\"sources\": [node_ids], \"key_by\": \"name|id\"}.\n"
-        "- DELAY config uses {\"seconds\": number}.\n"
+        f"{type_rules}"
         "- IDs must be integers and edges must connect existing node IDs.\n\n"
         "- Infer missing details and use reasonable defaults when the user is high-level.\n"
         "- Keep the workflow minimal and easy to understand.\n\n"
@@ -45,9 +40,22 @@ def build_generation_prompt(user_prompt: str) -> str:
     )
 
 
+def build_repair_prompt(generation_prompt: str, response_text: str, errors: Sequence[str]) -> str:
+    problems = "".join(f"- {error}\n" for error in errors)
+    return (
+        f"{generation_prompt}\n\n"
+        "Your previous answer was:\n"
+        f"{response_text}\n\n"
+        "It was rejected because:\n"
+        f"{problems}\n"
+        "Return the corrected workflow as ONLY valid JSON."
+    )
+
+
 def call_gemini(prompt: str) -> str:
     if not settings.gemini_api_key:
         raise ValueError("GEMINI_API_KEY is not set")
+    import httpx
 
     payload = {
         "contents": [
@@ -60,11 +68,9 @@ def call_gemini(prompt: str) -> str:
             "temperature": 0.2,
         },
     }
-    url = (
-        "https://generativelanguage.googleapis.com/v1beta/models/"
-        f"{settings.gemini_model}:generateContent?key={settings.gemini_api_key}"
-    )
-    response = httpx.post(url, json=payload, timeout=30.0)
+    url = f"{settings.gemini_api_base}{settings.gemini_model}:generateContent?key={settings.gemini_api_key}"
+    with llm_limiter.limit(settings.gemini_model):
+        response = httpx.post(url, json=payload, timeout=30.0)
     response.raise_for_status()
     data = response.json()
     candidates = data.get("candidates") or []
@@ -83,7 +89,7 @@ def parse_json_response(text: str) -> Dict[str, Any]:
         match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", cleaned, re.DOTALL)
         if match:
             cleaned = match.group(1)
-    return json.loads(cleaned)
+    return loads(cleaned)
 
 
 def validate_workflow_payload(payload: Dict[str, Any]) -> List[str]:
@@ -114,7 +120,8 @@ def validate_workflow_payload(payload: Dict[str, Any]) -> List[str]:
             errors.append(f"Duplicate node id: {node_id}")
         node_ids.add(node_id)
 
-        if node_type not in ALLOWED_NODE_TYPES:
+        registered = node_types.get(node_type)
+        if registered is None:
             errors.append(f"Unsupported node type: {node_type}")
         if not isinstance(name, str) or not name:
             errors.append("Node name is required")
@@ -122,30 +129,8 @@ def validate_workflow_payload(payload: Dict[str, Any]) -> List[str]:
             errors.append(f"Node {node_id} config must be an object")
             continue
 
-        if node_type == "TRANSFORM" and not isinstance(config.get("template"), str):
-            errors.append(f"TRANSFORM node {node_id} requires template string")
-        if node_type == "HTTP" and not isinstance(config.get("url"), str):
-            errors.append(f"HTTP node {node_id} requires url string")
-        if node_type == "LLM" and not isinstance(config.get("prompt"), str):
-            errors.append(f"LLM node {node_id} requires prompt string")
-        if node_type == "OUTPUT":
-            select = config.get("select")
-            if select is not None and not isinstance(select, list):
-                errors.append(f"OUTPUT node {node_id} select must be a list")
-        if node_type == "CONDITION":
-            if "left" not in config or "right" not in config:
-                errors.append(f"CONDITION node {node_id} requires left and right values")
-            operator = config.get("operator")
-            if not isinstance(operator, str):
-                errors.append(f"CONDITION node {node_id} requires operator string")
-        if node_type == "MERGE":
-            sources = config.get("sources")
-            if sources is not None and not isinstance(sources, list):
-                errors.append(f"MERGE node {node_id} sources must be a list")
-        if node_type == "DELAY":
-            seconds = config.get("seconds")
-            if seconds is None or not isinstance(seconds, (int, float)):
-                errors.append(f"DELAY node {node_id} requires seconds number")
+        if registered is not None:
+            errors.extend(registered.validate(node_id, config))
 
     if errors:
         return errors
@@ -166,10 +151,154 @@ def validate_workflow_payload(payload: Dict[str, Any]) -> List[str]:
     return errors
 
 
-def generate_workflow_from_prompt(prompt: str) -> Dict[str, Any]:
-    response_text = call_gemini(build_generation_prompt(prompt))
-    payload = parse_json_response(response_text)
-    errors = validate_workflow_payload(payload)
-    if errors:
-        raise ValueError("; ".join(errors))
-    return payload
+class GeminiGenerator:
+    name = "gemini"
+
+    @property
+    def model(self) -> str:
+        return settings.gemini_model
+
+    def complete(self, prompt: str) -> str:
+        return call_gemini(prompt)
+
+
+class StubGenerator:
+    """Offline generator: replays scripted ``responses`` in order, then a fixed minimal workflow."""
+
+    name = "stub"
+    model = "stub"
+
+    def __init__(self, responses: Optional[Sequence[str]] = None) -> None:
+        self.responses = list(responses or ())
+        self.prompts: List[str] = []
+
+    def complete(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if self.responses:
+            return self.responses.pop(0)
+        return dumps(
+            {
+                "name": "Generated workflow",
+                "description": None,
+                "nodes": [
+                    {"id": 1, "type": "INPUT", "name": "Input", "config": {}},
+                    {"id": 2, "type": "LLM", "name": "Answer", "config": {"prompt": "{{text}}"}},
+                    {"id": 3, "type": "OUTPUT", "name": "Result", "config": {"select": [2]}},
+                ],
+                "edges": [{"from_node_id": 1, "to_node_id": 2}, {"from_node_id": 2, "to_node_id": 3}],
+            }
+        )
+
+
+def build_generator() -> Any:
+    if settings.workflow_generator == "stub":
+        return StubGenerator()
+    return GeminiGenerator()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Whitespace and trailing punctuation do not change the generated workflow.
+
+    Case is kept: prompts may quote URLs, JSON keys or ``{{Field}}`` names.
+    """
+    return " ".join(prompt.split()).rstrip(" .!?")
+
+
+class GenerationCache:
+    """LRU of validated workflows keyed by provider, model and normalized prompt.
+
+    Entries are stored encoded so every hit returns an independent copy.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl_seconds > 0 and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return loads(entry[1])
+
+    def put(self, key: Hashable, payload: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        encoded = dumps_bytes(payload)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+generation_cache = GenerationCache(settings.generation_cache_size, settings.generation_cache_ttl_seconds)
+_generation_flight = SingleFlight()
+_generator: Any = None
+_generator_lock = threading.Lock()
+
+
+def get_generator() -> Any:
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = build_generator()
+        return _generator
+
+
+def ungeneratable_node_errors(payload: Dict[str, Any]) -> List[str]:
+    """Errors for nodes of types that are excluded from generation; ``payload`` must be valid."""
+    return [
+        f"Node {node['id']} type {node['type']} cannot be generated"
+        for node in payload["nodes"]
+        if not node_types.get(node["type"]).generatable
+    ]
+
+
+def generate_validated(generator: Any, prompt: str, max_repairs: int) -> Dict[str, Any]:
+    """Ask ``generator`` for a workflow, feeding validation errors back up to ``max_repairs`` times."""
+    generation_prompt = build_generation_prompt(prompt)
+    request = generation_prompt
+    for attempt in range(max_repairs + 1):
+        response_text = generator.complete(request)
+        try:
+            payload = parse_json_response(response_text)
+        except ValueError:
+            errors = ["Response is not valid JSON"]
+        else:
+            errors = validate_workflow_payload(payload) or ungeneratable_node_errors(payload)
+        if not errors:
+            return payload
+        if attempt < max_repairs:
+            request = build_repair_prompt(generation_prompt, response_text, errors)
+    raise ValueError("; ".join(errors))
+
+
+def generate_workflow_from_prompt(prompt: str, generator: Any = None) -> Dict[str, Any]:
+    """Generate a valid workflow, reusing cached results for equivalent prompts.
+
+    Concurrent requests for the same key share one generation.
+    """
+    generator = generator or get_generator()
+    key = (generator.name, generator.model, normalize_prompt(prompt))
+    cached = generation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    def generate() -> Dict[str, Any]:
+        payload = generate_validated(generator, prompt, settings.generation_max_repairs)
+        generation_cache.put(key, payload)
+        return payload
+
+    # Callers sharing one flight get their own copy of the result.
+    return loads(dumps_bytes(_generation_flight.do(key, generate)))
@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Edge, Node, Workflow
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit.
+CHUNK_SIZE = 500
+
+
+def _chunks(items: Sequence, size: int = CHUNK_SIZE) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _node_row(workflow_id: int, node) -> Dict:
+    return {
+        "id": node.id,
+        "workflow_id": workflow_id,
+        "type": node.type,
+        "name": node.name,
+        "config": node.config,
+    }
+
+
+def _edge_row(workflow_id: int, edge) -> Dict:
+    return {"workflow_id": workflow_id, "from_node_id": edge.from_node_id, "to_node_id": edge.to_node_id}
+
+
+def bump_version(db: Session, workflow_id: int) -> None:
+    """Mark a workflow as changed so cached runtime plans are rebuilt."""
+    db.query(Workflow).filter(Workflow.id == workflow_id).update(
+        {Workflow.version: Workflow.version + 1}, synchronize_session=False
+    )
+
+
+def insert_graph(db: Session, workflow_id: int, nodes: Sequence, edges: Sequence) -> None:
+    """Insert a whole graph with one executemany per table."""
+    if nodes:
+        db.bulk_insert_mappings(Node, [_node_row(workflow_id, node) for node in nodes])
+    if edges:
+        db.bulk_insert_mappings(Edge, [_edge_row(workflow_id, edge) for edge in edges])
+
+
+def sync_graph(db: Session, workflow_id: int, nodes: Sequence, edges: Sequence) -> Dict[str, int]:
+    """Apply only the node and edge differences between the stored graph and the payload.
+
+    Nodes are matched by id and updated when type, name or config changed.
+    Edges are matched by (from_node_id, to_node_id); duplicates are kept as
+    many times as the payload lists them.
+    """
+    existing_nodes = {
+        row.id: (row.type, row.name, row.config)
+        for row in db.query(Node.id, Node.type, Node.name, Node.config).filter(Node.workflow_id == workflow_id)
+    }
+    incoming_nodes = {node.id: node for node in nodes}
+
+    removed_nodes = [node_id for node_id in existing_nodes if node_id not in incoming_nodes]
+    added_nodes = [node for node_id, node in incoming_nodes.items() if node_id not in existing_nodes]
+    changed_nodes = [
+        node
+        for node_id, node in incoming_nodes.items()
+        if node_id in existing_nodes and existing_nodes[node_id] != (node.type, node.name, node.config)
+    ]
+
+    existing_edges: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for row in db.query(Edge.id, Edge.from_node_id, Edge.to_node_id).filter(Edge.workflow_id == workflow_id):
+        existing_edges[(row.from_node_id, row.to_node_id)].append(row.id)
+    added_edges = []
+    for edge in edges:
+        ids = existing_edges.get((edge.from_node_id, edge.to_node_id))
+        if ids:
+            ids.pop()
+        else:
+            added_edges.append(edge)
+    removed_edges = [edge_id for ids in existing_edges.values() for edge_id in ids]
+
+    for chunk in _chunks(removed_edges):
+        db.query(Edge).filter(Edge.id.in_(chunk)).delete(synchronize_session=False)
+    for chunk in _chunks(removed_nodes):
+        db.query(Node).filter(Node.workflow_id == workflow_id, Node.id.in_(chunk)).delete(
+            synchronize_session=False
+        )
+    if changed_nodes:
+        db.bulk_update_mappings(Node, [_node_row(workflow_id, node) for node in changed_nodes])
+    insert_graph(db, workflow_id, added_nodes, added_edges)
+
+    return {
+        "nodes_added": len(added_nodes),
+        "nodes_updated": len(changed_nodes),
+        "nodes_removed": len(removed_nodes),
+        "edges_added": len(added_edges),
+        "edges_removed": len(removed_edges),
+    }
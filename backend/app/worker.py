@@ -0,0 +1,285 @@
+"""Standalone run worker: ``python -m app.worker [--processes N]``.
+
+Workers claim PENDING runs from the ``runs`` table, keep a lease on them
+with heartbeats while executing, and reclaim RUNNING runs whose lease has
+expired because their worker died. Any number of worker processes, on any
+number of machines, can share one database.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.db.models import Run, StepLog, Workflow
+from app.db.schema import ensure_schema
+from app.db.session import SessionLocal, engine
+from app.services.run_events import run_events
+from app.services.run_control import run_controls
+from app.services.run_executor import cancel_requested, execute_run, executor_id
+from app.services.runtime import load_plan
+from app.services.scheduler import queue_plan
+
+logger = logging.getLogger("agentflow.worker")
+
+CLAIM_CANDIDATES = 10
+
+
+def _expired_lease(now: datetime):
+    return and_(Run.status == "RUNNING", Run.lease_expires_at.isnot(None), Run.lease_expires_at < now)
+
+
+def _queued(workflow_id: int, priority: str):
+    return and_(
+        Run.status == "PENDING",
+        Run.worker_id.is_(None),
+        Run.workflow_id == workflow_id,
+        Run.priority == priority,
+    )
+
+
+def _below_cap(workflow_id: int, cap: int):
+    running = aliased(Run)
+    count = (
+        select(func.count(running.id))
+        .where(running.workflow_id == workflow_id, running.status == "RUNNING")
+        .scalar_subquery()
+    )
+    return count < cap
+
+
+def _claim_first(
+    db: Session,
+    criteria,
+    values: Dict,
+    workflow_id: Optional[int] = None,
+    cap: int = 0,
+) -> Optional[Run]:
+    if db.get_bind().dialect.name == "postgresql":
+        if cap:
+            # Serialize claims for a capped workflow so concurrent workers
+            # cannot both take its last free slot.
+            db.query(Workflow.id).filter(Workflow.id == workflow_id).with_for_update().first()
+            running = db.query(func.count(Run.id)).filter(Run.workflow_id == workflow_id, Run.status == "RUNNING")
+            if running.scalar() >= cap:
+                db.rollback()
+                return None
+        run = db.query(Run).filter(criteria).order_by(Run.id).with_for_update(skip_locked=True).first()
+        if run is None:
+            db.rollback()
+            return None
+        for key, value in values.items():
+            setattr(run, key, value)
+        run.attempts = (run.attempts or 0) + 1
+        db.commit()
+        return run
+
+    # SQLite has no row locks: pick candidates, then claim one with a
+    # conditional UPDATE that only succeeds if it is still claimable (and,
+    # for capped workflows, still below the cap; SQLite serializes writes).
+    conditions = [criteria]
+    if cap:
+        conditions.append(_below_cap(workflow_id, cap))
+    candidates = [row.id for row in db.query(Run.id).filter(criteria).order_by(Run.id).limit(CLAIM_CANDIDATES)]
+    for run_id in candidates:
+        claimed = (
+            db.query(Run)
+            .filter(Run.id == run_id, *conditions)
+            .update({**values, "attempts": Run.attempts + 1}, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return db.get(Run, run_id)
+    return None
+
+
+def claim_next_run(db: Session, worker_id: str, lease_seconds: float) -> Optional[Run]:
+    """Atomically take ownership of the next run, or return None.
+
+    Runs whose worker died (expired lease) are reclaimed first; otherwise the
+    queue is served in the weighted fair order chosen by ``app.services.scheduler``.
+    """
+    now = datetime.utcnow()
+    values = {
+        "status": "RUNNING",
+        "worker_id": worker_id,
+        "started_at": now,
+        "heartbeat_at": now,
+        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+    }
+
+    run = _claim_first(db, _expired_lease(now), values)
+    if run is not None:
+        return run
+
+    for group, cap in queue_plan(db):
+        run = _claim_first(db, _queued(group.workflow_id, group.priority), values, group.workflow_id, cap)
+        if run is not None:
+            run.queue_wait_seconds = max((now - run.queued_at).total_seconds(), 0.0) if run.queued_at else None
+            db.commit()
+            return run
+    return None
+
+
+class Heartbeat(threading.Thread):
+    """Extends a claimed run's lease until stopped."""
+
+    def __init__(self, run_id: int, worker_id: str, interval: float, lease_seconds: float) -> None:
+        super().__init__(name=f"heartbeat-{run_id}", daemon=True)
+        self.run_id = run_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            db = SessionLocal()
+            try:
+                now = datetime.utcnow()
+                updated = (
+                    db.query(Run)
+                    .filter(Run.id == self.run_id, Run.worker_id == self.worker_id, Run.status == "RUNNING")
+                    .update(
+                        {"heartbeat_at": now, "lease_expires_at": now + timedelta(seconds=self.lease_seconds)},
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if not updated:
+                    # Another worker reclaimed the run; stop executing it
+                    # before the next node instead of duplicating side effects.
+                    self.lost = True
+                    run_controls.cancel(self.run_id, "Run lease lost to another worker")
+                    return
+                if cancel_requested(db, self.run_id):
+                    # Wakes DELAY waits and stops the run before its next node.
+                    run_controls.cancel(self.run_id)
+            except Exception:
+                db.rollback()
+                logger.exception("Heartbeat for run %s failed", self.run_id)
+            finally:
+                db.close()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def process_next_run(worker_id: str) -> bool:
+    """Claim and execute one run; returns False when nothing was claimable."""
+    db = SessionLocal()
+    try:
+        run = claim_next_run(db, worker_id, settings.worker_lease_seconds)
+        if run is None:
+            return False
+
+        if run.attempts > 1:
+            db.add(
+                StepLog(
+                    run_id=run.id,
+                    node_id=None,
+                    status="RETRY",
+                    message=f"Run reclaimed by {worker_id} after lease expiry (attempt {run.attempts})",
+                    timestamp=datetime.utcnow(),
+                )
+            )
+            db.commit()
+        if run.attempts > settings.worker_max_attempts:
+            run.status = "FAILED"
+            run.finished_at = datetime.utcnow()
+            run.lease_expires_at = None
+            db.add(
+                StepLog(
+                    run_id=run.id,
+                    node_id=None,
+                    status="FAILED",
+                    message=f"Run abandoned after {settings.worker_max_attempts} attempts",
+                    timestamp=datetime.utcnow(),
+                )
+            )
+            db.commit()
+            run_events.finish(run.id, run.status)
+            return True
+
+        plan = load_plan(db, run.workflow_id)
+        if plan is None:
+            return True
+        heartbeat = Heartbeat(run.id, worker_id, settings.worker_heartbeat_seconds, settings.worker_lease_seconds)
+        heartbeat.start()
+        try:
+            execute_run(db, run, plan, run.run_input or {})
+        finally:
+            heartbeat.stop()
+        if heartbeat.lost:
+            logger.warning("Worker %s lost the lease on run %s while executing it", worker_id, run.id)
+        return True
+    finally:
+        db.close()
+
+
+def run_worker(stop_event: Optional[threading.Event] = None, once: bool = False) -> None:
+    stop_event = stop_event or threading.Event()
+    worker_id = executor_id("worker")
+    logger.info("Worker %s started", worker_id)
+    while not stop_event.is_set():
+        try:
+            claimed = process_next_run(worker_id)
+        except Exception:
+            logger.exception("Worker %s failed to process a run", worker_id)
+            claimed = False
+        if not claimed:
+            if once:
+                break
+            stop_event.wait(settings.worker_poll_seconds)
+    logger.info("Worker %s stopped", worker_id)
+
+
+def _worker_process(once: bool) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    run_worker(stop_event, once=once)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Execute queued AgentFlow runs.")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--once", action="store_true", help="exit when no claimable runs remain")
+    args = parser.parse_args(argv)
+
+    ensure_schema(engine)
+    if args.processes <= 1:
+        _worker_process(args.once)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker_process, args=(args.once,), name=f"worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop_children(*_) -> None:
+        for process in processes:
+            process.terminate()
+
+    # Children handle Ctrl+C themselves and finish their current run.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop_children)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
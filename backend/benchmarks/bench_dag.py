@@ -0,0 +1,52 @@
+"""Time DAG analysis on large generated graphs.
+
+Run from the backend directory:
+
+    python benchmarks/bench_dag.py [--nodes 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.dag import analyze_dag  # noqa: E402
+
+
+def graphs(count: int):
+    rng = random.Random(1)
+    nodes = [{"id": node_id} for node_id in range(count)]
+    chain = [{"from_node_id": node_id, "to_node_id": node_id + 1} for node_id in range(count - 1)]
+    fan = [
+        {"from_node_id": rng.randrange(0, count // 2), "to_node_id": rng.randrange(count // 2, count)}
+        for _ in range(count)
+    ]
+    cycle = chain + [{"from_node_id": count - 1, "to_node_id": count // 2}]
+    return {
+        "chain": (nodes, chain),
+        "chain + random fan-in": (nodes, chain + fan),
+        "chain with a cycle": (nodes, cycle),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'graph':<26}{'edges':>10}{'best ms':>10}")
+    for name, (nodes, edges) in graphs(args.nodes).items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            analyze_dag(nodes, edges)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:<26}{len(edges):>10}{min(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Simulate interactive queue wait under a batch flood, FIFO versus fair order.
+
+Discrete-time simulation of the worker claim policy; no database involved.
+One workflow enqueues a large batch backlog up front, while interactive runs
+of other workflows arrive at a steady rate.
+
+Run from the backend directory:
+
+    python benchmarks/bench_scheduler.py [--workers 8] [--batch 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.scheduler import QueueGroup, fair_order, parse_weights  # noqa: E402
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def simulate(policy, workers, batch_runs, interactive_every, duration, service_time, seed=1):
+    rng = random.Random(seed)
+    weights = parse_weights("interactive=8,batch=2,background=1")
+    queues = {(0, "batch"): deque([0.0] * batch_runs)}
+    fifo = deque((0.0, (0, "batch")) for _ in range(batch_runs))
+    running = []  # (finish_time, workflow_id)
+    waits = []
+    now = 0.0
+    next_arrival = 0.0
+    step = 0.01
+    while now < duration:
+        while next_arrival <= now:
+            key = (rng.randrange(1, 20), "interactive")
+            queues.setdefault(key, deque()).append(next_arrival)
+            fifo.append((next_arrival, key))
+            next_arrival += interactive_every
+        running = [item for item in running if item[0] > now]
+        while len(running) < workers:
+            if policy == "fifo":
+                if not fifo:
+                    break
+                queued_at, key = fifo.popleft()
+                queues[key].popleft()
+            else:
+                counts = {}
+                for _, workflow_id in running:
+                    counts[workflow_id] = counts.get(workflow_id, 0) + 1
+                groups = [QueueGroup(key[0], key[1], queue[0], len(queue)) for key, queue in queues.items() if queue]
+                if not groups:
+                    break
+                best = fair_order(groups, counts, {}, weights)[0]
+                key = (best.workflow_id, best.priority)
+                queued_at = queues[key].popleft()
+            if key[1] == "interactive":
+                waits.append(now - queued_at)
+            running.append((now + service_time * rng.uniform(0.5, 1.5), key[0]))
+        now += step
+    return waits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=120.0, help="simulated seconds")
+    parser.add_argument("--service-time", type=float, default=1.0, help="mean run duration in seconds")
+    parser.add_argument("--interactive-every", type=float, default=0.5, help="seconds between interactive runs")
+    args = parser.parse_args()
+
+    print(f"{'policy':<8}{'served':>8}{'p50 wait s':>12}{'p99 wait s':>12}")
+    for policy in ("fifo", "fair"):
+        waits = simulate(policy, args.workers, args.batch, args.interactive_every, args.duration, args.service_time)
+        if not waits:
+            print(f"{policy:<8}{0:>8}{'-':>12}{'-':>12}")
+            continue
+        print(f"{policy:<8}{len(waits):>8}{percentile(waits, 0.5):>12.2f}{percentile(waits, 0.99):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
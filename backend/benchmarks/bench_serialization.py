@@ -0,0 +1,117 @@
+"""Compare stdlib json with the app serializer on realistic payloads.
+
+Run from the backend directory:
+
+    python benchmarks/bench_serialization.py [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import serialization  # noqa: E402
+from app.services.workflow_engine import summarize_output  # noqa: E402
+
+
+def step_logs(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": index,
+            "node_id": index % 500,
+            "node_name": f"Node {index % 500}",
+            "status": "SUCCESS" if index % 17 else "FAILED",
+            "message": f"{{\"text\":\"result {index}\",\"score\":{index / 7:.4f}}}",
+            "timestamp": (start + timedelta(milliseconds=index)).isoformat(),
+        }
+        for index in range(count)
+    ]
+
+
+def workflow_graph(count: int) -> dict:
+    return {
+        "id": 1,
+        "name": "Generated pipeline",
+        "description": "Large generated workflow",
+        "created_at": "2024-01-01T00:00:00",
+        "nodes": [
+            {
+                "id": index,
+                "type": "TRANSFORM",
+                "name": f"Step {index}",
+                "config": {"template": f"Previous: {{{{Step {index - 1}}}}} / {index}"},
+            }
+            for index in range(1, count + 1)
+        ],
+        "edges": [{"id": index, "from_node_id": index, "to_node_id": index + 1} for index in range(1, count)],
+    }
+
+
+def http_document(count: int) -> dict:
+    return {
+        "data": [
+            {
+                "id": index,
+                "title": f"Item {index}",
+                "tags": ["alpha", "beta", "gamma"],
+                "price": index * 1.25,
+                "available": index % 3 == 0,
+                "owner": {"id": index % 97, "name": "Ünïcode owner"},
+            }
+            for index in range(count)
+        ],
+        "meta": {"page": 1, "total": count},
+    }
+
+
+def bench(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    payloads = {
+        "step logs (5k rows)": step_logs(5000),
+        "workflow graph (5k nodes)": workflow_graph(5000),
+        "http response (20k items)": http_document(20000),
+    }
+    results = []
+    for name, payload in payloads.items():
+        stdlib_ms = bench(lambda: json.dumps(payload), args.repeat)
+        fast_ms = bench(lambda: serialization.dumps_bytes(payload), args.repeat)
+        summary_ms = bench(lambda: summarize_output(payload), args.repeat)
+        results.append(
+            {
+                "payload": name,
+                "bytes": len(serialization.dumps_bytes(payload)),
+                "stdlib_ms": round(stdlib_ms, 3),
+                "fast_ms": round(fast_ms, 3),
+                "speedup": round(stdlib_ms / fast_ms, 1) if fast_ms else None,
+                "summary_ms": round(summary_ms, 3),
+            }
+        )
+
+    if args.json:
+        print(json.dumps({"backend": serialization.BACKEND, "results": results}, indent=2))
+        return
+
+    print(f"serializer backend: {serialization.BACKEND}")
+    print(f"{'payload':<28}{'bytes':>12}{'stdlib ms':>12}{'fast ms':>10}{'speedup':>9}{'summary ms':>12}")
+    for row in results:
+        print(
+            f"{row['payload']:<28}{row['bytes']:>12}{row['stdlib_ms']:>12}"
+            f"{row['fast_ms']:>10}{row['speedup']:>8}x{row['summary_ms']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
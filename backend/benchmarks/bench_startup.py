@@ -0,0 +1,115 @@
+"""Measure API cold start and enforce the import-time budget.
+
+Each sample is a fresh interpreter that imports ``app.main``, prepares the
+schema and answers one ``GET /health``. The first sample starts from an empty
+SQLite database (``create_all`` runs); later samples find the recorded schema
+version and skip it. Exits non-zero when the median import time exceeds the
+budget or when a lazily loaded module was imported at startup.
+
+Run from the backend directory:
+
+    python benchmarks/bench_startup.py [--runs 7] [--budget-ms 600]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that must only load when a request needs them.
+LAZY_MODULES = ("httpx", "app.services.llm_providers", "app.services.workflow_generator")
+
+CHILD = r"""
+import asyncio
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import app.main  # noqa: E402
+imported = time.perf_counter()
+
+from app.db.schema import ensure_schema  # noqa: E402
+from app.db.session import engine  # noqa: E402
+
+created = ensure_schema(engine)
+schema_ready = time.perf_counter()
+
+
+async def health():
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/health", "headers": [], "query_string": b""}
+    await app.main.app(scope, receive, send)
+    return messages[0]["status"]
+
+
+status = asyncio.run(health())
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "schema_ms": (schema_ready - imported) * 1000,
+    "health_ms": (done - schema_ready) * 1000,
+    "created": created,
+    "status": status,
+    "loaded": [name for name in LAZY_MODULES if name in sys.modules],
+}))
+"""
+
+
+def sample(database_url: str) -> dict:
+    env = {**os.environ, "DATABASE_URL": database_url, "PYTHONWARNINGS": "ignore"}
+    code = f"LAZY_MODULES = {LAZY_MODULES!r}\n{CHILD}"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=600.0, help="median import time budget for app.main")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        samples = [sample(database_url) for _ in range(args.runs)]
+
+    first, warm = samples[0], samples[1:] or samples
+    print(f"{'phase':<28}{'median ms':>12}{'max ms':>10}")
+    for key, label in (("import_ms", "import app.main"), ("schema_ms", "schema check"), ("health_ms", "first /health")):
+        values = [item[key] for item in warm]
+        print(f"{label:<28}{statistics.median(values):>12.1f}{max(values):>10.1f}")
+    print(f"{'schema create (empty db)':<28}{first['schema_ms']:>12.1f}")
+
+    failures = []
+    import_median = statistics.median(item["import_ms"] for item in samples)
+    if import_median > args.budget_ms:
+        failures.append(f"import time {import_median:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+    loaded = sorted({name for item in samples for name in item["loaded"]})
+    if loaded:
+        failures.append(f"loaded at startup: {', '.join(loaded)}")
+    if any(item["created"] for item in samples[1:]):
+        failures.append("create_all ran although the schema version matched")
+    if any(item["status"] != 200 for item in samples):
+        failures.append("/health did not return 200")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
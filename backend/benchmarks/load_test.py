@@ -0,0 +1,353 @@
+"""Drive load against a local API process with stub upstreams and report latency.
+
+Starts, on this machine only:
+
+- a stub upstream server answering HTTP node requests (``GET /data``) and the
+  Gemini ``generateContent`` / ``streamGenerateContent`` endpoints, with
+  configurable latency and error rate;
+- the API under uvicorn against a fresh SQLite database (or ``--database-url``),
+  with ``GEMINI_API_BASE`` pointed at the stub;
+- optionally ``python -m app.worker`` processes when ``--run-execution worker``.
+
+It then creates one workflow of the chosen shape and fires ``POST
+/workflows/{id}/run`` at ``--rps`` for ``--duration`` seconds (open loop, so
+slow responses do not lower the offered load). With ``--poll`` each run is
+followed by ``GET /runs/{id}`` and ``GET /runs/{id}/logs``. The report lists
+throughput and p50/p95/p99 latency per endpoint and counts "database is
+locked" errors seen in responses and in the API log.
+
+Run from the backend directory:
+
+    python benchmarks/load_test.py [--shape fanout] [--rps 50] [--duration 30] [--json report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LOCK_ERROR = re.compile(rb"database is locked|deadlock detected|could not obtain lock", re.IGNORECASE)
+SHAPES = ("linear", "http", "llm", "fanout", "chain")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class StubUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, latency_ms: float, error_rate: float, payload_items: int) -> None:
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.data = json.dumps({"items": [{"id": item, "value": "x" * 32} for item in range(payload_items)]}).encode()
+        self.requests = 0
+        self._rng = random.Random(7)
+        self._lock = threading.Lock()
+
+    def plan_response(self) -> bool:
+        """Sleep for the configured latency; return False when this request should fail."""
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(0.5, 1.5)
+            fail = self._rng.random() < self.error_rate
+        time.sleep(self.latency_ms * jitter / 1000.0)
+        return not fail
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self.server.plan_response():
+            return self._send(503, b'{"error":"stub failure"}')
+        self._send(200, self.server.data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if not self.server.plan_response():
+            return self._send(503, b'{"error":"stub failure"}')
+        candidate = {"candidates": [{"content": {"parts": [{"text": "stub answer"}]}}]}
+        if ":streamGenerateContent" in self.path:
+            return self._send(200, f"data: {json.dumps(candidate)}\n\n".encode(), "text/event-stream")
+        self._send(200, json.dumps(candidate).encode())
+
+
+def workflow_payload(shape: str, width: int, upstream: str) -> Dict[str, Any]:
+    http = {"url": f"{upstream}/data", "select": "$.items[0]"}
+    llm = {"prompt": "Summarize {{text}}"}
+    nodes: List[Dict[str, Any]] = [{"id": 1, "type": "INPUT", "name": "In", "config": {"key": "text"}}]
+    edges: List[Dict[str, int]] = []
+    if shape == "linear":
+        nodes.append({"id": 2, "type": "TRANSFORM", "name": "Step", "config": {"template": "{{In}}!"}})
+    elif shape == "http":
+        nodes.append({"id": 2, "type": "HTTP", "name": "Fetch", "config": http})
+    elif shape == "llm":
+        nodes.append({"id": 2, "type": "LLM", "name": "Ask", "config": llm})
+    elif shape == "chain":
+        for index in range(width):
+            previous = "In" if index == 0 else f"Step {index}"
+            config = {"template": "{{%s}}." % previous}
+            nodes.append({"id": index + 2, "type": "TRANSFORM", "name": f"Step {index + 1}", "config": config})
+            edges.append({"from_node_id": index + 1, "to_node_id": index + 2})
+    else:
+        branch_ids = list(range(2, width + 2))
+        for node_id in branch_ids:
+            config, node_type = (http, "HTTP") if node_id % 2 == 0 else (llm, "LLM")
+            nodes.append({"id": node_id, "type": node_type, "name": f"Branch {node_id}", "config": config})
+            edges.append({"from_node_id": 1, "to_node_id": node_id})
+        merge_id = width + 2
+        nodes.append({"id": merge_id, "type": "MERGE", "name": "Merge", "config": {"sources": branch_ids}})
+        edges.extend({"from_node_id": node_id, "to_node_id": merge_id} for node_id in branch_ids)
+    if shape in {"linear", "http", "llm"}:
+        edges.append({"from_node_id": 1, "to_node_id": 2})
+    last = nodes[-1]["id"]
+    nodes.append({"id": last + 1, "type": "OUTPUT", "name": "Out", "config": {"select": [last]}})
+    edges.append({"from_node_id": last, "to_node_id": last + 1})
+    return {"name": f"load-{shape}", "nodes": nodes, "edges": edges}
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+        self.lock_errors = 0
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int], body: bytes = b"") -> None:
+        self.samples.setdefault(endpoint, []).append(seconds)
+        key = str(status) if status is not None else "transport"
+        counts = self.statuses.setdefault(endpoint, {})
+        counts[key] = counts.get(key, 0) + 1
+        if status is None or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        if body and LOCK_ERROR.search(body):
+            self.lock_errors += 1
+
+
+async def timed(client: httpx.AsyncClient, recorder: Recorder, endpoint: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(endpoint, time.perf_counter() - started, None)
+        return None
+    recorder.record(endpoint, time.perf_counter() - started, response.status_code, response.content)
+    return response
+
+
+async def one_run(client, recorder, workflow_id: int, sequence: int, poll: bool) -> None:
+    response = await timed(
+        client,
+        recorder,
+        "POST /workflows/{id}/run",
+        "POST",
+        f"/workflows/{workflow_id}/run",
+        json={"run_input": {"text": f"request {sequence}"}},
+    )
+    if not poll or response is None or response.status_code != 200:
+        return
+    run_id = response.json()["id"]
+    await timed(client, recorder, "GET /runs/{id}", "GET", f"/runs/{run_id}")
+    await timed(client, recorder, "GET /runs/{id}/logs", "GET", f"/runs/{run_id}/logs")
+
+
+async def drive(base_url: str, workflow_id: int, rps: float, duration: float, poll: bool, recorder: Recorder) -> float:
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        tasks = []
+        started = time.perf_counter()
+        sequence = 0
+        while True:
+            due = started + sequence / rps
+            if due - started >= duration:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one_run(client, recorder, workflow_id, sequence, poll)))
+            sequence += 1
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+def wait_for_health(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("API process exited during startup; see its log")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit("API did not become healthy in time")
+
+
+def build_report(args, recorder: Recorder, elapsed: float, server_lock_errors: int, upstream_requests: int) -> Dict:
+    endpoints = {}
+    for endpoint, values in recorder.samples.items():
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(endpoint, 0),
+            "statuses": recorder.statuses.get(endpoint, {}),
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": max(values) * 1000,
+        }
+    return {
+        "config": {
+            "shape": args.shape,
+            "width": args.width,
+            "target_rps": args.rps,
+            "duration_s": args.duration,
+            "api_workers": args.api_workers,
+            "run_execution": args.run_execution,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "upstream_error_rate": args.upstream_error_rate,
+        },
+        "elapsed_s": elapsed,
+        "db_lock_errors": {"responses": recorder.lock_errors, "server_log": server_lock_errors},
+        "upstream_requests": upstream_requests,
+        "endpoints": endpoints,
+    }
+
+
+def print_table(report: Dict) -> None:
+    print(f"{'endpoint':<26}{'requests':>9}{'errors':>8}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:<26}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>8.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+    locks = report["db_lock_errors"]
+    print(f"db lock errors: {locks['responses']} in responses, {locks['server_log']} in the API log")
+    print(f"upstream requests served: {report['upstream_requests']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", choices=SHAPES, default="fanout")
+    parser.add_argument("--width", type=int, default=4, help="branches for fanout, steps for chain")
+    parser.add_argument("--rps", type=float, default=20.0, help="target run requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--poll", action="store_true", help="fetch each run and its logs after it returns")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--run-execution", choices=("inline", "worker"), default="inline")
+    parser.add_argument("--worker-processes", type=int, default=2, help="run workers with --run-execution worker")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-items", type=int, default=100, help="items in the stub HTTP JSON response")
+    parser.add_argument("--database-url", default="", help="default: a fresh SQLite file in a temp dir")
+    parser.add_argument("--json", default="", help="write the JSON report to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    upstream = StubUpstream(free_port(), args.upstream_latency_ms, args.upstream_error_rate, args.upstream_items)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(directory, 'load.db')}",
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_BASE": f"{upstream_url}/models/",
+            "LLM_PROVIDER": "gemini",
+            "RUN_EXECUTION": args.run_execution,
+            "BLOB_DIR": os.path.join(directory, "blobs"),
+            "PYTHONWARNINGS": "ignore",
+        }
+        log_path = os.path.join(directory, "api.log")
+        processes = []
+        with open(log_path, "wb") as log:
+            api = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+                    "--workers", str(args.api_workers), "--log-level", "warning",
+                ],
+                cwd=BACKEND,
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+            processes.append(api)
+            try:
+                wait_for_health(base_url, api)
+                if args.run_execution == "worker":
+                    processes.append(
+                        subprocess.Popen(
+                            [sys.executable, "-m", "app.worker", "--processes", str(args.worker_processes)],
+                            cwd=BACKEND,
+                            env=env,
+                            stdout=log,
+                            stderr=subprocess.STDOUT,
+                        )
+                    )
+                created = httpx.post(
+                    f"{base_url}/workflows", json=workflow_payload(args.shape, args.width, upstream_url), timeout=30.0
+                )
+                created.raise_for_status()
+                recorder = Recorder()
+                workflow_id = created.json()["id"]
+                elapsed = asyncio.run(drive(base_url, workflow_id, args.rps, args.duration, args.poll, recorder))
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+        with open(log_path, "rb") as log:
+            server_lock_errors = len(LOCK_ERROR.findall(log.read()))
+
+    upstream.shutdown()
+    report = build_report(args, recorder, elapsed, server_lock_errors, upstream.requests)
+    print_table(report)
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
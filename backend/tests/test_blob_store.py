@@ -0,0 +1,37 @@
+import base64
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import blobs
+from app.services.blob_store import BlobStore
+from app.services.node_executors.llm import parse_image_payload
+
+
+def test_upload_is_content_addressed_and_read_lazily(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(blobs, "blob_store", store)
+    app = FastAPI()
+    app.include_router(blobs.router)
+    client = TestClient(app)
+
+    body = b"\x89PNG" + bytes(range(256)) * 64
+    first = client.post("/blobs", content=body, headers={"Content-Type": "image/png"})
+    second = client.post("/blobs", content=body, headers={"Content-Type": "image/png"})
+    assert first.status_code == 201
+    assert first.json() == second.json()
+    assert first.json()["size"] == len(body)
+
+    image = store.image(first.json())
+    assert image.mime_type == "image/png"
+    assert image["data"] == base64.b64encode(body).decode()
+    assert client.get(f"/blobs/{first.json()['blob']}").content == body
+
+
+def test_blob_reference_in_run_input(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr("app.services.node_executors.llm.blob_store", store)
+    digest = store.put(b"pixels")
+
+    image = parse_image_payload({"blob": f"sha256:{digest}", "mime_type": "image/jpeg"})
+    assert dict(image) == {"mime_type": "image/jpeg", "data": base64.b64encode(b"pixels").decode()}
@@ -1,4 +1,4 @@
-from app.services.dag import topological_sort, validate_dag
+from app.services.dag import analyze_dag, topological_sort, validate_dag
 
 
 def test_validate_dag_detects_cycle():
@@ -29,3 +29,47 @@ def test_topological_sort_orders_nodes():
     order = topological_sort(nodes, edges)
     assert order[0] == 1
     assert set(order) == {1, 2, 3}
+
+
+def test_analyze_dag_reports_cycle_path_and_blocked_nodes():
+    nodes = [{"id": node_id} for node_id in range(1, 6)]
+    edges = [
+        {"from_node_id": 1, "to_node_id": 2},
+        {"from_node_id": 2, "to_node_id": 3},
+        {"from_node_id": 3, "to_node_id": 2},
+        {"from_node_id": 3, "to_node_id": 4},
+        {"from_node_id": 1, "to_node_id": 5},
+    ]
+    analysis = analyze_dag(nodes, edges)
+    assert analysis.cycles == [[2, 3]]
+    assert analysis.blocked == [4]
+    assert analysis.unreachable == []
+    assert analysis.order == [1, 5]
+    assert "2 -> 3 -> 2" in analysis.errors[0]
+
+
+def test_analyze_dag_reports_nodes_no_source_reaches():
+    nodes = [{"id": node_id} for node_id in range(1, 5)]
+    edges = [
+        {"from_node_id": 2, "to_node_id": 3},
+        {"from_node_id": 3, "to_node_id": 2},
+        {"from_node_id": 3, "to_node_id": 4},
+    ]
+    analysis = analyze_dag(nodes, edges)
+    assert analysis.order == [1]
+    assert analysis.blocked == [4]
+    assert analysis.unreachable == [2, 3, 4]
+
+
+def test_analyze_dag_levels_and_csr_adjacency():
+    nodes = [{"id": 10}, {"id": 20}, {"id": 30}]
+    edges = [
+        {"from_node_id": 10, "to_node_id": 20},
+        {"from_node_id": 10, "to_node_id": 30},
+        {"from_node_id": 20, "to_node_id": 30},
+        {"from_node_id": 20, "to_node_id": 30},
+    ]
+    analysis = analyze_dag(nodes, edges)
+    assert analysis.levels == {10: 0, 20: 1, 30: 2}
+    assert list(analysis.offsets) == [0, 2, 3, 3]
+    assert list(analysis.targets) == [1, 2, 2]
@@ -0,0 +1,90 @@
+import pytest
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware
+from app.db.models import Run, StepLog
+from app.db.session import get_db
+from app.responses import FastJSONResponse, etag_matches, not_modified, tagged_json
+from app.routers import runs, workflows
+
+GRAPH = {
+    "name": "wf",
+    "nodes": [{"id": 1, "type": "INPUT", "name": "In", "config": {}}],
+    "edges": [],
+}
+
+
+def _client(db):
+    app = FastAPI()
+    app.include_router(workflows.router)
+    app.include_router(runs.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def test_workflow_and_logs_answer_304_until_they_change(db):
+    client = _client(db)
+    workflow_id = client.post("/workflows", json=GRAPH).json()["id"]
+
+    first = client.get(f"/workflows/{workflow_id}")
+    etag = first.headers["etag"]
+    cached = client.get(f"/workflows/{workflow_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    client.put(f"/workflows/{workflow_id}", json={"name": "renamed"})
+    changed = client.get(f"/workflows/{workflow_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["name"] == "renamed"
+
+    db.add(Run(id=7, workflow_id=workflow_id, status="RUNNING"))
+    db.add(StepLog(run_id=7, node_id=1, status="SUCCESS", message="ok"))
+    db.commit()
+    etag = client.get("/runs/7/logs").headers["etag"]
+    assert client.get("/runs/7/logs", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    db.add(StepLog(run_id=7, node_id=None, status="SUCCESS", message="done"))
+    db.commit()
+    assert len(client.get("/runs/7/logs", headers={"If-None-Match": etag}).json()) == 2
+
+    etag = client.get("/runs/7/logs").headers["etag"]
+    client.patch(f"/workflows/{workflow_id}/nodes/1", json={"name": "Renamed"})
+    renamed = client.get("/runs/7/logs", headers={"If-None-Match": etag})
+    assert renamed.status_code == 200 and renamed.json()[0]["node_name"] == "Renamed"
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_large_json_is_compressed(encoding):
+    if encoding == "br":
+        pytest.importorskip("brotli")
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big():
+        return FastJSONResponse({"items": ["value"] * 1000})
+
+    response = TestClient(app).get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.json() == {"items": ["value"] * 1000}
+    assert response.num_bytes_downloaded < 1024
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compressed_responses_get_a_per_encoding_etag(encoding):
+    if encoding == "br":
+        pytest.importorskip("brotli")
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big(request: Request):
+        if etag_matches(request.headers.get("if-none-match"), '"big-1"'):
+            return not_modified('"big-1"')
+        return tagged_json({"items": ["value"] * 1000}, '"big-1"')
+
+    client = TestClient(app)
+    assert client.get("/big", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"big-1"'
+    response = client.get("/big", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"] == f'"big-1-{encoding}"'
+    cached = client.get("/big", headers={"Accept-Encoding": encoding, "If-None-Match": f'"big-1-{encoding}"'})
+    assert cached.status_code == 304 and cached.headers["etag"] == f'"big-1-{encoding}"'
@@ -0,0 +1,28 @@
+import httpx
+import pytest
+
+from app.services.json_path import compile_path, select
+from app.services.node_executors.http import read_response
+
+
+def _response(body, content_type):
+    return httpx.Response(200, content=body, headers={"content-type": content_type})
+
+
+def test_json_path_projection():
+    document = {"data": {"items": [{"id": 1, "tags": ["a"]}, {"id": 2}]}, "odd key": True}
+    assert select(document, compile_path("$.data.items[*].id")) == [1, 2]
+    assert select(document, compile_path("data.items[-1]")) == {"id": 2}
+    assert select(document, compile_path("$['odd key']")) is True
+    assert select(document, compile_path("$.data.missing")) is None
+    with pytest.raises(ValueError):
+        compile_path("$.data[")
+
+
+def test_read_response_formats_and_cap():
+    records = b'{"id": 1, "big": "x"}\n{"id": 2, "big": "y"}\n'
+    assert read_response(_response(records, "application/x-ndjson"), "auto", 0, compile_path("[*].id")) == [1, 2]
+    assert read_response(_response(b"plain", "text/plain"), "auto", 0, None) == "plain"
+    assert read_response(_response(b'{"a": {"b": 3}}', "text/plain"), "auto", 0, compile_path("a.b")) == 3
+    with pytest.raises(ValueError, match="exceeds 8 bytes"):
+        read_response(_response(b'{"a": "0123456789"}', "application/json"), "json", 8, None)
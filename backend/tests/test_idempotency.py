@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException, Response
+
+from app.db.models import Node, Run, Workflow
+from app.routers.workflows import run_workflow
+from app.schemas.run import RunCreate
+
+
+def _workflow(db):
+    workflow = Workflow(name="echo")
+    workflow.nodes = [Node(id=1, type="INPUT", name="in", config={})]
+    db.add(workflow)
+    db.commit()
+    return workflow.id
+
+
+def test_retry_with_same_key_replays_the_run(db):
+    workflow_id = _workflow(db)
+    payload = RunCreate(run_input={"text": "hi"})
+
+    first = run_workflow(workflow_id, payload, Response(), idempotency_key="abc", db=db)
+    replay = Response()
+    second = run_workflow(workflow_id, payload, replay, idempotency_key="abc", db=db)
+
+    assert second.id == first.id
+    assert second.status == "SUCCESS"
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Run).count() == 1
+
+
+def test_reused_key_with_different_body_conflicts(db):
+    workflow_id = _workflow(db)
+    run_workflow(workflow_id, RunCreate(idempotency_key="abc"), Response(), idempotency_key=None, db=db)
+
+    with pytest.raises(HTTPException) as exc:
+        run_workflow(workflow_id, RunCreate(run_input={"text": "other"}), Response(), idempotency_key="abc", db=db)
+    assert exc.value.status_code == 409
@@ -0,0 +1,34 @@
+import threading
+
+from app.services.llm_providers import BatchingLLMProvider, DummyLLMProvider, FakeBatchLLMProvider
+
+
+def _generate_concurrently(provider, prompts):
+    results = {}
+
+    def call(prompt):
+        results[prompt] = provider.generate(prompt, {})
+
+    threads = [threading.Thread(target=call, args=(prompt,)) for prompt in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_batching_groups_concurrent_prompts():
+    fake = FakeBatchLLMProvider()
+    provider = BatchingLLMProvider(fake, max_batch_size=4, window_seconds=0.05)
+    prompts = [f"prompt {index}" for index in range(10)]
+    results = _generate_concurrently(provider, prompts)
+
+    assert {prompt: result["text"] for prompt, result in results.items()} == {p: p for p in prompts}
+    assert sum(fake.batch_sizes) == 10
+    assert max(fake.batch_sizes) <= 4
+    assert len(fake.batch_sizes) < 10
+
+
+def test_batching_passes_through_non_batching_providers():
+    provider = BatchingLLMProvider(DummyLLMProvider(), max_batch_size=4)
+    assert provider.generate("hi", {"a": 1})["provider"] == "dummy"
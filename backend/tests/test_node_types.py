@@ -0,0 +1,63 @@
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db.session import get_db
+from app.routers import workflows
+from app.services.node_types import NodeType, NodeTypeRegistry
+from app.services.runtime import RuntimeNode, build_plan
+from app.services.workflow_engine import RunState, execute_node
+from app.services.workflow_generator import validate_workflow_payload
+
+
+async def _shout(node, state):
+    return state.run_input["text"].upper()
+
+
+def test_registry_loads_executors_lazily_and_runs_async_ones():
+    registry = NodeTypeRegistry()
+    lazy = registry.register(NodeType("echo", "app.services.node_executors.core:execute_input"))
+    assert lazy.name == "ECHO" and not lazy.loaded
+    assert lazy.execute(RuntimeNode(1, "echo", "e", {"value": 3}), RunState(None, {}, {})) == 3
+    assert lazy.loaded
+
+    shout = registry.register(NodeType("SHOUT", _shout))
+    assert shout.execute(None, RunState(None, {}, {"text": "hi"})) == "HI"
+    assert registry.names() == ["ECHO", "SHOUT"]
+
+
+def test_builtin_types_validate_and_dispatch():
+    errors = validate_workflow_payload(
+        {
+            "nodes": [
+                {"id": 1, "type": "TRANSFORM", "name": "t", "config": {}},
+                {"id": 2, "type": "SLEEP", "name": "s", "config": {}},
+            ],
+            "edges": [],
+        }
+    )
+    assert errors == ["TRANSFORM node 1 requires template string", "Unsupported node type: SLEEP"]
+
+    node = RuntimeNode(1, "transform", "t", {"template": "{{text}}!"})
+    plan = build_plan(1, 1, [node], [])
+    assert execute_node(node, RunState(plan, {}, {"text": "hi"})) == "hi!"
+    assert "app.services.node_executors.core" in sys.modules
+
+
+def test_workflow_routes_reject_invalid_node_configs(db):
+    app = FastAPI()
+    app.include_router(workflows.router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+    graph = {"name": "wf", "nodes": [{"id": 1, "type": "transform", "name": "t", "config": {}}], "edges": []}
+
+    created = client.post("/workflows", json=graph)
+    assert created.status_code == 400
+    assert created.json()["detail"] == ["TRANSFORM node 1 requires template string"]
+
+    graph["nodes"][0]["config"] = {"template": "{{text}}"}
+    workflow_id = client.post("/workflows", json=graph).json()["id"]
+    patched = client.patch(f"/workflows/{workflow_id}/nodes/1", json={"type": "SLEEP"})
+    assert patched.status_code == 400 and patched.json()["detail"] == ["Unsupported node type: SLEEP"]
+    assert client.get(f"/workflows/{workflow_id}").json()["nodes"][0]["type"] == "transform"
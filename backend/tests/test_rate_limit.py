@@ -0,0 +1,53 @@
+import threading
+import time
+
+from app.services.rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_queues_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == 0.5
+    assert clock.now == 1.0
+
+
+def test_rate_limiter_caps_concurrency_per_key():
+    limiter = RateLimiter(max_concurrency=2)
+    active = {"a": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def call():
+        with limiter.limit("example.com"):
+            with lock:
+                active["a"] += 1
+                active["peak"] = max(active["peak"], active["a"])
+            time.sleep(0.02)
+            with lock:
+                active["a"] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert active["peak"] == 2
+
+
+def test_rate_limiter_disabled_by_default():
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    with limiter.limit("example.com"):
+        pass
@@ -0,0 +1,49 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models import Run, StepLog
+from app.services.run_control import RunCancelled, RunControl, run_controls
+from app.services.run_executor import execute_run
+from app.services.runtime import RuntimeNode, build_plan
+
+
+def _delay_plan(seconds):
+    nodes = [RuntimeNode(1, "DELAY", "wait", {"seconds": seconds}), RuntimeNode(2, "OUTPUT", "out", {})]
+    edges = [SimpleNamespace(from_node_id=1, to_node_id=2)]
+    return build_plan(1, 1, nodes, edges)
+
+
+def test_wait_is_interrupted_by_cancel():
+    control = RunControl(1)
+    threading.Timer(0.05, control.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(RunCancelled):
+        control.wait(5)
+    assert time.monotonic() - started < 1
+
+
+def test_deadline_cancels_delay_node_and_run(db):
+    run = Run(id=1, workflow_id=1, status="PENDING", deadline_at=datetime.utcnow() + timedelta(seconds=0.2))
+    db.add(run)
+    db.commit()
+
+    started = time.monotonic()
+    execute_run(db, run, _delay_plan(10), {})
+    assert time.monotonic() - started < 2
+    assert run.status == "CANCELLED"
+    logs = [(log.node_id, log.status, log.message) for log in db.query(StepLog).order_by(StepLog.id)]
+    assert logs == [(1, "CANCELLED", "Run deadline exceeded"), (None, "CANCELLED", "Run deadline exceeded")]
+
+
+def test_cancel_reaches_run_executing_in_this_process(db):
+    run = Run(id=1, workflow_id=1, status="PENDING")
+    db.add(run)
+    db.commit()
+
+    threading.Timer(0.1, run_controls.cancel, args=(1,)).start()
+    execute_run(db, run, _delay_plan(10), {})
+    assert run.status == "CANCELLED"
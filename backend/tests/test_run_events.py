@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Run, StepLog
+from app.routers.runs import poll_run_events
+from app.services.run_events import RunEventBus
+
+
+def test_run_in_another_process_is_followed_through_the_database(db):
+    db.add(Run(id=1, workflow_id=1, status="RUNNING"))
+    db.add(StepLog(run_id=1, node_id=3, status="SUCCESS", message="ok", timestamp=datetime.utcnow()))
+    db.commit()
+    events = poll_run_events(1, sessionmaker(bind=db.get_bind()), interval=0.01)
+
+    assert next(events) == {"type": "step", "status": "SUCCESS", "message": "ok", "node_id": 3}
+    db.query(Run).filter(Run.id == 1).update({"status": "SUCCESS"})
+    db.commit()
+    assert list(events) == [{"type": "run", "status": "SUCCESS"}]
+
+
+def test_unused_channel_is_dropped_when_subscriber_leaves():
+    bus = RunEventBus()
+    events = bus.subscribe(5, idle_timeout=0.01)
+    assert next(events) is None
+    events.close()
+    assert not bus.has_channel(5)
@@ -0,0 +1,75 @@
+import pickle
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import Edge, Node, Run, StepLog, Workflow
+from app.services.runtime import RuntimeNode, load_plan, plan_cache, plan_output_release
+from app.services.workflow_engine import execute_plan
+from app.services.workflow_store import bump_version
+
+
+def test_plan_output_release_drops_outputs_after_last_consumer():
+    nodes = {
+        1: RuntimeNode(1, "INPUT", "In", None),
+        2: RuntimeNode(2, "TRANSFORM", "Upper", {"template": "{{In}}!"}),
+        3: RuntimeNode(3, "TRANSFORM", "Again", {"template": "{{Upper}}?"}),
+        4: RuntimeNode(4, "OUTPUT", "Out", {"select": [3]}),
+    }
+    edges = [(1, 2), (2, 3), (3, 4)]
+    assert plan_output_release([1, 2, 3, 4], nodes, edges) == {2: (1,), 3: (2,), 4: (3,)}
+
+    nodes[4] = RuntimeNode(4, "output", "Out", None)
+    assert plan_output_release([1, 2, 3, 4], nodes, edges) == {4: (1, 2, 3)}
+
+
+def test_load_plan_is_cached_per_version_and_runs_without_orm_nodes(db):
+    plan_cache.clear()
+    db.add(Workflow(id=1, name="wf"))
+    db.add_all(
+        [
+            Node(id=1, workflow_id=1, type="INPUT", name="In", config={"key": "text"}),
+            Node(id=2, workflow_id=1, type="transform", name="Shout", config={"template": "{{In}}!"}),
+            Edge(workflow_id=1, from_node_id=1, to_node_id=2),
+        ]
+    )
+    db.add(Run(id=1, workflow_id=1, status="RUNNING"))
+    db.commit()
+
+    plan = load_plan(db, 1)
+    assert plan.order == (1, 2)
+    assert plan.nodes[2].type == "TRANSFORM"
+    assert load_plan(db, 1) is plan
+    with pytest.raises(AttributeError):
+        plan.nodes[1].name = "changed"
+    with pytest.raises(TypeError):
+        plan.nodes[2].config["template"] = "changed"
+    with pytest.raises(TypeError):
+        plan.name_to_id["Other"] = 3
+    assert pickle.loads(pickle.dumps(plan)).nodes[2].config == {"template": "{{In}}!"}
+
+    db.expunge_all()
+    assert execute_plan(db, plan, 1, {"text": "hi"}) == {2: "hi!"}
+    assert [log.status for log in db.query(StepLog).order_by(StepLog.id)] == ["SUCCESS", "SUCCESS"]
+
+    bump_version(db, 1)
+    db.commit()
+    assert load_plan(db, 1) is not plan
+    assert load_plan(db, 2) is None
+
+
+def test_load_plan_does_not_serve_a_deleted_workflow_to_one_reusing_its_id(db):
+    plan_cache.clear()
+    created = datetime(2024, 1, 1)
+    db.add(Workflow(id=1, name="old", created_at=created))
+    db.add(Node(id=1, workflow_id=1, type="INPUT", name="Old", config={"key": "text"}))
+    db.commit()
+    assert load_plan(db, 1).name_to_id == {"Old": 1}
+
+    # Deleted elsewhere, so this process's cache was never told.
+    db.query(Node).delete()
+    db.query(Workflow).delete()
+    db.add(Workflow(id=1, name="new", created_at=created + timedelta(seconds=1)))
+    db.add(Node(id=2, workflow_id=1, type="INPUT", name="New", config={"key": "text"}))
+    db.commit()
+    assert load_plan(db, 1).name_to_id == {"New": 2}
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from app.services.run_control import RunCancelled, RunControl
+from app.services.single_flight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"value": 42}
+
+    _run_concurrently(5, lambda: results.append(flight.do("GET https://example.com", fetch)))
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 5
+    assert len({id(result) for result in results}) == 5
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_cancelled_follower_stops_waiting_for_the_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("key", lambda: release.wait(5)))
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.01)
+
+    control = RunControl()
+    threading.Timer(0.05, control.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(RunCancelled):
+        flight.do("key", lambda: None, control)
+    assert time.monotonic() - started < 1
+    release.set()
+    leader.join()
@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import schema
+from app.db.schema import SCHEMA_VERSION, ensure_schema, stored_schema_version
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Tables as the first release created them, before any column was added.
+BASELINE_SCHEMA = [
+    "CREATE TABLE workflows (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(200) NOT NULL, description TEXT, "
+    "created_at DATETIME NOT NULL)",
+    "CREATE INDEX ix_workflows_id ON workflows (id)",
+    "CREATE TABLE nodes (id INTEGER NOT NULL, "
+    "workflow_id INTEGER NOT NULL REFERENCES workflows (id) ON DELETE CASCADE, "
+    "type VARCHAR(50) NOT NULL, config JSON NOT NULL, name VARCHAR(200) NOT NULL, PRIMARY KEY (id, workflow_id))",
+    "CREATE INDEX ix_nodes_id ON nodes (id)",
+    "CREATE TABLE edges (id INTEGER NOT NULL PRIMARY KEY, "
+    "workflow_id INTEGER NOT NULL REFERENCES workflows (id) ON DELETE CASCADE, "
+    "from_node_id INTEGER NOT NULL, to_node_id INTEGER NOT NULL)",
+    "CREATE INDEX ix_edges_id ON edges (id)",
+    "CREATE TABLE runs (id INTEGER NOT NULL PRIMARY KEY, "
+    "workflow_id INTEGER NOT NULL REFERENCES workflows (id) ON DELETE CASCADE, "
+    "status VARCHAR(20) NOT NULL, started_at DATETIME, finished_at DATETIME)",
+    "CREATE INDEX ix_runs_id ON runs (id)",
+    "CREATE TABLE step_logs (id INTEGER NOT NULL PRIMARY KEY, "
+    "run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE, node_id INTEGER, "
+    "status VARCHAR(20) NOT NULL, message TEXT NOT NULL, timestamp DATETIME NOT NULL)",
+    "CREATE INDEX ix_step_logs_id ON step_logs (id)",
+    "INSERT INTO workflows (id, name, created_at) VALUES (1, 'wf', '2024-01-01 00:00:00')",
+    "INSERT INTO runs (id, workflow_id, status, started_at) VALUES (1, 1, 'SUCCESS', '2024-01-01 00:00:01')",
+]
+
+# What schema version 1 added on top of the baseline.
+VERSION_1_SCHEMA = [
+    "ALTER TABLE workflows ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE runs ADD COLUMN run_input JSON",
+    "ALTER TABLE runs ADD COLUMN worker_id VARCHAR(200)",
+    "ALTER TABLE runs ADD COLUMN heartbeat_at DATETIME",
+    "ALTER TABLE runs ADD COLUMN lease_expires_at DATETIME",
+    "ALTER TABLE runs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX ix_runs_status ON runs (status)",
+    "CREATE TABLE schema_version (id INTEGER NOT NULL PRIMARY KEY, version INTEGER NOT NULL, "
+    "updated_at DATETIME NOT NULL)",
+    "INSERT INTO schema_version (id, version, updated_at) VALUES (1, 1, '2024-01-01 00:00:00')",
+]
+
+
+def _engine(tmp_path, statements):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+    return engine
+
+
+def test_ensure_schema_skips_create_all_once_version_is_recorded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    assert stored_schema_version(engine) is None
+    assert ensure_schema(engine) is True
+    assert stored_schema_version(engine) == SCHEMA_VERSION
+    assert ensure_schema(engine) is False
+    engine.dispose()
+
+
+def test_ensure_schema_upgrades_existing_tables(tmp_path):
+    engine = _engine(tmp_path, BASELINE_SCHEMA + VERSION_1_SCHEMA)
+    assert ensure_schema(engine) is True
+    assert stored_schema_version(engine) == SCHEMA_VERSION
+    inspector = inspect(engine)
+    assert {"priority", "queued_at", "deadline_at", "idempotency_key"} <= {
+        column["name"] for column in inspector.get_columns("runs")
+    }
+    assert {"ix_runs_queue", "uq_runs_idempotency_key"} <= {index["name"] for index in inspector.get_indexes("runs")}
+    with engine.connect() as connection:
+        row = connection.execute(text("SELECT priority, queued_at, started_at FROM runs")).one()
+    assert row.priority == "interactive" and row.queued_at == row.started_at
+    engine.dispose()
+
+
+def test_ensure_schema_upgrades_a_database_from_before_versions_were_recorded(tmp_path):
+    engine = _engine(tmp_path, BASELINE_SCHEMA)
+    assert ensure_schema(engine) is True
+    assert stored_schema_version(engine) == SCHEMA_VERSION
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version FROM workflows")).scalar() == 1
+        assert connection.execute(text("SELECT attempts, priority FROM runs")).one() == (0, "interactive")
+        assert connection.execute(text("SELECT COUNT(workflow_id) FROM step_logs")).scalar() == 0
+    engine.dispose()
+
+
+def test_ensure_schema_does_not_record_a_version_while_columns_are_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(schema, "MIGRATIONS", {})
+    engine = _engine(tmp_path, BASELINE_SCHEMA + VERSION_1_SCHEMA)
+    with pytest.raises(RuntimeError, match="runs.priority"):
+        ensure_schema(engine)
+    assert stored_schema_version(engine) == 1
+    engine.dispose()
+
+
+def test_app_import_does_not_load_http_or_llm_clients(tmp_path):
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('httpx', 'app.services.llm_providers') if m in sys.modules))"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}", "PYTHONWARNINGS": "ignore"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
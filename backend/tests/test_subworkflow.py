@@ -0,0 +1,62 @@
+import pytest
+
+from app.db.models import Edge, Node, Run, StepLog, Workflow
+from app.services.runtime import load_plan, plan_cache
+from app.services.workflow_engine import execute_plan
+
+
+def _workflow(db, workflow_id, nodes, edges=()):
+    db.add(Workflow(id=workflow_id, name=f"wf{workflow_id}"))
+    db.add_all(
+        Node(id=node_id, workflow_id=workflow_id, type=node_type, name=name, config=config)
+        for node_id, node_type, name, config in nodes
+    )
+    db.add_all(Edge(workflow_id=workflow_id, from_node_id=a, to_node_id=b) for a, b in edges)
+
+
+def test_subworkflow_runs_callee_plan_and_logs_under_parent_run(db):
+    plan_cache.clear()
+    _workflow(
+        db,
+        1,
+        [
+            (1, "INPUT", "In", {"key": "text"}),
+            (2, "SUBWORKFLOW", "Shout", {"workflow_id": 2, "inputs": {"word": "{{In}}"}}),
+        ],
+        [(1, 2)],
+    )
+    _workflow(
+        db,
+        2,
+        [(1, "TRANSFORM", "Loud", {"template": "{{word}}!"}), (2, "OUTPUT", "Out", {"select": ["Loud"]})],
+        [(1, 2)],
+    )
+    db.add(Run(id=1, workflow_id=1, status="RUNNING"))
+    db.commit()
+
+    assert execute_plan(db, load_plan(db, 1), 1, {"text": "hi"})[2] == {"Loud": "hi!"}
+    logs = [(log.workflow_id, log.node_id, log.status) for log in db.query(StepLog).order_by(StepLog.id)]
+    assert logs == [(None, 1, "SUCCESS"), (2, 1, "SUCCESS"), (2, 2, "SUCCESS"), (None, 2, "SUCCESS")]
+
+
+def test_subworkflow_cycle_is_rejected(db):
+    plan_cache.clear()
+    _workflow(db, 1, [(1, "SUBWORKFLOW", "Call 2", {"workflow_id": 2})])
+    _workflow(db, 2, [(1, "SUBWORKFLOW", "Call 1", {"workflow_id": 1})])
+    db.add(Run(id=1, workflow_id=1, status="RUNNING"))
+    db.commit()
+
+    with pytest.raises(ValueError, match="cycle: 1 -> 2 -> 1"):
+        execute_plan(db, load_plan(db, 1), 1, {})
+
+
+def test_subworkflow_without_inputs_gets_a_copy_of_the_run_input(db):
+    plan_cache.clear()
+    _workflow(db, 1, [(1, "SUBWORKFLOW", "Call 2", {"workflow_id": 2})])
+    _workflow(db, 2, [(1, "INPUT", "Word", {"key": "word", "value": "default"})])
+    db.add(Run(id=1, workflow_id=1, status="RUNNING"))
+    db.commit()
+
+    run_input = {"text": "hi"}
+    assert execute_plan(db, load_plan(db, 1), 1, run_input)[1] == "default"
+    assert run_input == {"text": "hi"}
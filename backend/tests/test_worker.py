@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import Run, Workflow
+from app.services import run_executor
+from app.services.run_executor import execute_run
+from app.services.runtime import RuntimeNode, build_plan
+from app.worker import claim_next_run
+
+
+@pytest.fixture(autouse=True)
+def workflow(db):
+    db.add(Workflow(id=1, name="wf"))
+    db.commit()
+
+
+def test_claim_next_run_claims_each_pending_run_once(db):
+    db.add_all([Run(workflow_id=1, status="PENDING"), Run(workflow_id=1, status="PENDING")])
+    db.add(Run(workflow_id=1, status="RUNNING", worker_id="api-host-1"))
+    db.commit()
+
+    first = claim_next_run(db, "worker-a", 60)
+    second = claim_next_run(db, "worker-b", 60)
+    assert {first.id, second.id} == {1, 2}
+    assert first.status == "RUNNING" and first.worker_id == "worker-a"
+    assert first.attempts == 1
+    assert claim_next_run(db, "worker-c", 60) is None
+
+
+def test_claim_next_run_reclaims_expired_leases(db):
+    expired = datetime.utcnow() - timedelta(seconds=5)
+    db.add(Run(workflow_id=1, status="RUNNING", worker_id="worker-dead", lease_expires_at=expired, attempts=1))
+    db.commit()
+
+    run = claim_next_run(db, "worker-a", 60)
+    assert run.worker_id == "worker-a"
+    assert run.attempts == 2
+    assert run.lease_expires_at > datetime.utcnow()
+
+
+def test_claim_serves_interactive_runs_and_shares_across_workflows(db):
+    db.add(Workflow(id=2, name="bulk"))
+    old = datetime.utcnow() - timedelta(minutes=5)
+    db.add_all([Run(workflow_id=2, status="PENDING", priority="batch", queued_at=old) for _ in range(5)])
+    db.add(Run(workflow_id=1, status="PENDING", priority="interactive"))
+    db.add(Run(workflow_id=1, status="PENDING", priority="interactive"))
+    db.commit()
+
+    claimed = [claim_next_run(db, f"worker-{index}", 60) for index in range(4)]
+    assert [run.workflow_id for run in claimed] == [1, 2, 1, 2]
+    assert claimed[1].queue_wait_seconds >= 300
+
+
+def test_claim_respects_workflow_concurrency_cap(db):
+    db.query(Workflow).filter(Workflow.id == 1).update({"max_concurrency": 1})
+    db.add_all([Run(workflow_id=1, status="PENDING"), Run(workflow_id=1, status="PENDING")])
+    db.commit()
+
+    first = claim_next_run(db, "worker-a", 60)
+    assert first is not None
+    assert claim_next_run(db, "worker-b", 60) is None
+    first.status = "SUCCESS"
+    db.commit()
+    assert claim_next_run(db, "worker-b", 60) is not None
+
+
+
+def test_worker_that_lost_its_lease_does_not_overwrite_the_run(db, monkeypatch):
+    run = Run(workflow_id=1, status="RUNNING", worker_id="worker-a")
+    db.add(run)
+    db.commit()
+
+    def reclaimed_meanwhile(db, plan, run_id, run_input, control):
+        db.query(Run).filter(Run.id == run_id).update({"worker_id": "worker-b"})
+        db.commit()
+
+    monkeypatch.setattr(run_executor, "execute_plan", reclaimed_meanwhile)
+    execute_run(db, run, build_plan(1, 1, [RuntimeNode(1, "INPUT", "in", {})], []), {})
+    assert (run.status, run.worker_id, run.finished_at) == ("RUNNING", "worker-b", None)
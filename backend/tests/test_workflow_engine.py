@@ -0,0 +1,55 @@
+import json
+
+from app.services import serialization
+from app.services.llm_providers import FakeBatchLLMProvider
+from app.services.node_executors.llm import stream_llm_output
+from app.services.output_store import OutputStore
+from app.services.run_events import RunEventBus
+from app.services.workflow_engine import summarize_output
+
+
+def test_stream_llm_output_forwards_chunks():
+    events = []
+    output = stream_llm_output(FakeBatchLLMProvider(), "one two three", {}, None, 0, events.append)
+    assert output == {"provider": "fake", "text": "one two three", "truncated": False}
+    assert [event["text"] for event in events] == ["one", " two", " three"]
+
+
+def test_stream_llm_output_cuts_off_at_byte_cap():
+    output = stream_llm_output(FakeBatchLLMProvider(), "one two three", {}, None, 6)
+    assert output["text"] == "one tw"
+    assert output["truncated"] is True
+
+
+def test_run_event_bus_replays_and_ends_on_finish():
+    bus = RunEventBus()
+    bus.publish(7, {"type": "step", "node_id": 1})
+    bus.finish(7, "SUCCESS")
+    assert list(bus.subscribe(7)) == [
+        {"type": "step", "node_id": 1},
+        {"type": "run", "status": "SUCCESS"},
+    ]
+
+
+def test_summarize_output_truncates_without_full_serialization():
+    value = {"items": list(range(100000))}
+    summary = summarize_output(value)
+    assert summary == json.dumps(value, separators=(",", ":"))[:200] + "...(truncated)"
+    assert summarize_output({"a": 1}) == '{"a":1}'
+
+
+def test_serializer_output_matches_across_backends():
+    value = {"a": [1, 2.5, None], 2: "é"}
+    assert serialization.dumps(value) == '{"a":[1,2.5,null],"2":"é"}'
+    assert "".join(serialization.iterencode(value)) == serialization.dumps(value)
+
+
+def test_output_store_spills_large_values(tmp_path):
+    store = OutputStore(spill_bytes=100, spill_dir=str(tmp_path))
+    store[1] = "small"
+    store[2] = {"blob": "x" * 1000}
+    assert not store.is_spilled(1)
+    assert store.is_spilled(2)
+    assert store[2] == {"blob": "x" * 1000}
+    store.close()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,45 @@
+from app.services.serialization import dumps
+from app.services.workflow_generator import (
+    StubGenerator,
+    build_generation_prompt,
+    generate_workflow_from_prompt,
+    generation_cache,
+)
+
+VALID = {
+    "name": "Echo",
+    "nodes": [{"id": 1, "type": "INPUT", "name": "In", "config": {}}],
+    "edges": [],
+}
+
+
+def test_invalid_response_is_repaired_then_cached():
+    generation_cache.clear()
+    invalid = {**VALID, "nodes": [{"id": 1, "type": "TRANSFORM", "name": "T", "config": {}}]}
+    generator = StubGenerator(["not json", dumps(invalid), dumps(VALID)])
+
+    assert generate_workflow_from_prompt("Echo the input.", generator) == VALID
+    assert len(generator.prompts) == 3
+    assert "TRANSFORM node 1 requires template string" in generator.prompts[2]
+
+    assert generate_workflow_from_prompt("  Echo the   input ", generator) == VALID
+    assert len(generator.prompts) == 3
+
+    assert generate_workflow_from_prompt("Echo the {{Input}}", generator) != VALID
+    assert len(generator.prompts) == 4
+
+
+def test_default_stub_output_is_valid():
+    generation_cache.clear()
+    payload = generate_workflow_from_prompt("summarize text", StubGenerator())
+    assert [node["type"] for node in payload["nodes"]] == ["INPUT", "LLM", "OUTPUT"]
+
+
+def test_subworkflow_nodes_are_not_generated():
+    generation_cache.clear()
+    assert "SUBWORKFLOW" not in build_generation_prompt("call workflow 7")
+    guessed = {**VALID, "nodes": [{"id": 1, "type": "SUBWORKFLOW", "name": "Call", "config": {"workflow_id": 7}}]}
+    generator = StubGenerator([dumps(guessed), dumps(VALID)])
+
+    assert generate_workflow_from_prompt("call workflow 7", generator) == VALID
+    assert "Node 1 type SUBWORKFLOW cannot be generated" in generator.prompts[1]
@@ -0,0 +1,33 @@
+from app.db.models import Edge, Node, Workflow
+from app.schemas.workflow import EdgeInput, NodeInput
+from app.services.workflow_store import insert_graph, sync_graph
+
+
+def _graph(nodes, edges):
+    return (
+        [NodeInput(id=node_id, type="TRANSFORM", name=name, config={"template": name}) for node_id, name in nodes],
+        [EdgeInput(from_node_id=source, to_node_id=target) for source, target in edges],
+    )
+
+
+def test_sync_graph_applies_only_changes(db):
+    db.add(Workflow(id=1, name="wf"))
+    nodes, edges = _graph([(1, "a"), (2, "b"), (3, "c")], [(1, 2), (2, 3)])
+    insert_graph(db, 1, nodes, edges)
+    db.commit()
+    untouched_edge = db.query(Edge.id).filter(Edge.from_node_id == 1).scalar()
+
+    nodes, edges = _graph([(1, "a"), (2, "b2"), (4, "d")], [(1, 2), (2, 4)])
+    changes = sync_graph(db, 1, nodes, edges)
+    db.commit()
+
+    assert changes == {
+        "nodes_added": 1,
+        "nodes_updated": 1,
+        "nodes_removed": 1,
+        "edges_added": 1,
+        "edges_removed": 1,
+    }
+    assert {(node.id, node.name) for node in db.query(Node)} == {(1, "a"), (2, "b2"), (4, "d")}
+    assert {(edge.from_node_id, edge.to_node_id) for edge in db.query(Edge)} == {(1, 2), (2, 4)}
+    assert db.query(Edge.id).filter(Edge.from_node_id == 1).scalar() == untouched_edge